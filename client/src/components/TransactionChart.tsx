@@ -14,37 +14,33 @@ import {
   Pie,
   Cell,
 } from "recharts"
-import type { Transaction } from "../types"
+import type { TransactionSummary } from "../types"
 
 interface TransactionChartProps {
-  transactions: Transaction[]
+  summary: TransactionSummary
 }
 
 const COLORS = ["#0088FE", "#00C49F", "#FFBB28", "#FF8042", "#8884D8", "#FF6B6B"]
 
-const TransactionChart = ({ transactions }: TransactionChartProps) => {
-  // Prepare data for monthly chart
+const TransactionChart = ({ summary }: TransactionChartProps) => {
+  // Prepare data for monthly chart from the server-side monthly series
   const monthlyData = useMemo(() => {
+    const byMonth = new Map(summary.monthly.map((m) => [m.month, m]))
+
     const last6Months = Array.from({ length: 6 }, (_, i) => {
       const date = new Date()
+      date.setDate(1)
       date.setMonth(date.getMonth() - i)
       return {
         month: date.toLocaleString("default", { month: "short" }),
         year: date.getFullYear(),
-        monthIndex: date.getMonth(),
-        yearMonth: `${date.getFullYear()}-${date.getMonth()}`,
+        key: `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, "0")}`,
       }
     }).reverse()
 
-    const data = last6Months.map(({ month, year, monthIndex, yearMonth }) => {
-      const monthlyTransactions = transactions.filter((t) => {
-        const tDate = new Date(t.transaction_date)
-        return tDate.getMonth() === monthIndex && tDate.getFullYear() === year
-      })
-
-      const income = monthlyTransactions.filter((t) => t.type === "income").reduce((sum, t) => sum + t.amount, 0)
-
-      const expense = monthlyTransactions.filter((t) => t.type === "expense").reduce((sum, t) => sum + t.amount, 0)
+    return last6Months.map(({ month, year, key }) => {
+      const income = byMonth.get(key)?.income ?? 0
+      const expense = byMonth.get(key)?.expenses ?? 0
 
       return {
         name: `${month} ${year}`,
@@ -53,29 +49,13 @@ const TransactionChart = ({ transactions }: TransactionChartProps) => {
         Balance: income - expense,
       }
     })
-
-    return data
-  }, [transactions])
+  }, [summary])
 
   // Prepare data for category pie chart
-  const categoryData = useMemo(() => {
-    const expensesByCategory: Record<string, number> = {}
-
-    transactions
-      .filter((t) => t.type === "expense")
-      .forEach((t) => {
-        if (expensesByCategory[t.category]) {
-          expensesByCategory[t.category] += t.amount
-        } else {
-          expensesByCategory[t.category] = t.amount
-        }
-      })
-
-    return Object.entries(expensesByCategory).map(([name, value]) => ({
-      name,
-      value,
-    }))
-  }, [transactions])
+  const categoryData = useMemo(
+    () => summary.categories.map(({ category, total }) => ({ name: category, value: total })),
+    [summary]
+  )
 
   return (
     <div className="space-y-8">
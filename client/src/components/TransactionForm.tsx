@@ -1,6 +1,7 @@
 "use client";
 
-import { useState, useContext } from "react";
+import { useState, useContext, useEffect } from "react";
+import axios from "axios";
 import { TransactionContext } from "../context/TransactionContext";
 import type { TransactionType } from "../types";
 
@@ -20,6 +21,28 @@ const TransactionForm = ({ onAddTransaction }: TransactionFormProps) => {
   });
 
   const [loading, setLoading] = useState(false);
+  const [suggestions, setSuggestions] = useState<string[]>([]);
+
+  // Suggest previously used descriptions once a couple of characters are typed
+  useEffect(() => {
+    const prefix = formData.description.trim();
+    if (prefix.length < 2) {
+      setSuggestions([]);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await axios.get<{ suggestions: { value: string; count: number }[] }>(
+          "http://127.0.0.1:8000/transactions/search",
+          { params: { q: prefix, mode: "prefix", field: "description", limit: 8 } }
+        );
+        setSuggestions(response.data.suggestions.map((s) => s.value));
+      } catch (error) {
+        console.error("Error fetching suggestions:", error);
+      }
+    }, 250);
+    return () => clearTimeout(timer);
+  }, [formData.description]);
 
   const handleChange = (e: React.ChangeEvent<HTMLInputElement | HTMLSelectElement>) => {
     const { name, value } = e.target;
@@ -70,7 +93,14 @@ const TransactionForm = ({ onAddTransaction }: TransactionFormProps) => {
           required
           className="w-full border border-gray-300 rounded-md p-2"
           placeholder="Transaction description"
+          list="description-suggestions"
+          autoComplete="off"
         />
+        <datalist id="description-suggestions">
+          {suggestions.map((value) => (
+            <option key={value} value={value} />
+          ))}
+        </datalist>
       </div>
 
       {/* Amount */}
@@ -1,45 +1,71 @@
 "use client"
 
-import { useContext } from "react"
+import { useContext, useEffect, useState } from "react"
+import axios from "axios"
 import { TransactionContext } from "../context/TransactionContext"
 import TransactionItem from "./TransactionItem"
-import type { FilterOptions } from "../types"
+import type { FilterOptions, Transaction } from "../types"
 
 interface TransactionListProps {
   filters: FilterOptions
 }
 
-const TransactionList = ({ filters }: TransactionListProps) => {
-  const { transactions, deleteTransaction } = useContext(TransactionContext)
-
-  // Apply filters
-  const filteredTransactions = transactions.filter((transaction) => {
-    if (filters.type !== "all" && transaction.type !== filters.type) return false
-    if (filters.category !== "all" && transaction.category !== filters.category) return false
-    return true
-  })
-
-  // Apply sorting
-  const sortedTransactions = [...filteredTransactions].sort((a, b) => {
-    if (filters.sortBy === "date") {
-      return filters.sortOrder === "asc"
-  ? new Date(a.transaction_date).getTime() - new Date(b.transaction_date).getTime()
-  : new Date(b.transaction_date).getTime() - new Date(a.transaction_date).getTime();
+const PAGE_SIZE = 50
 
-    }
+// Build the query string for GET /transactions/ from the active filters
+const buildParams = (filters: FilterOptions, cursor: string | null) => ({
+  limit: PAGE_SIZE,
+  sort_by: filters.sortBy,
+  sort_order: filters.sortOrder,
+  ...(filters.type !== "all" ? { type: filters.type } : {}),
+  ...(filters.category !== "all" ? { category: filters.category } : {}),
+  ...(cursor ? { after: cursor } : {}),
+})
 
-    if (filters.sortBy === "amount") {
-      return filters.sortOrder === "asc" ? a.amount - b.amount : b.amount - a.amount
-    }
+const toTransaction = (t: any): Transaction => ({
+  id: t.id,
+  description: t.description,
+  amount: t.amount,
+  type: t.type,
+  category: t.category,
+  transaction_date: new Date(t.transaction_date),
+})
+
+const TransactionList = ({ filters }: TransactionListProps) => {
+  const { summary, deleteTransaction } = useContext(TransactionContext)
+  const [items, setItems] = useState<Transaction[]>([])
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loading, setLoading] = useState(false)
 
-    if (filters.sortBy === "category") {
-      return filters.sortOrder === "asc" ? a.category.localeCompare(b.category) : b.category.localeCompare(a.category)
+  const fetchPage = async (cursor: string | null) => {
+    setLoading(true)
+    try {
+      const response = await axios.get<{ transactions: any[]; next_cursor: string | null }>(
+        "http://127.0.0.1:8000/transactions/",
+        { params: buildParams(filters, cursor) }
+      )
+      const page = response.data.transactions.map(toTransaction)
+      setItems((prev) => (cursor ? [...prev, ...page] : page))
+      setNextCursor(response.data.next_cursor)
+    } catch (error) {
+      console.error("Error fetching transactions:", error)
+    } finally {
+      setLoading(false)
     }
+  }
+
+  // Filtering and sorting happen on the server; refetch the first page when they change
+  // or when the shared summary is refreshed after a mutation
+  useEffect(() => {
+    fetchPage(null)
+  }, [filters.type, filters.category, filters.sortBy, filters.sortOrder, summary])
 
-    return 0
-  })
+  const handleDelete = (id: string) => {
+    setItems((prev) => prev.filter((t) => t.id !== id))
+    deleteTransaction(id)
+  }
 
-  if (sortedTransactions.length === 0) {
+  if (items.length === 0 && !loading) {
     return (
       <div className="text-center py-8 text-gray-500">No transactions found. Add some transactions to get started!</div>
     )
@@ -47,9 +73,19 @@ const TransactionList = ({ filters }: TransactionListProps) => {
 
   return (
     <div className="space-y-4">
-      {sortedTransactions.map((transaction) => (
-        <TransactionItem key={transaction.id} transaction={transaction} onDelete={deleteTransaction} />
+      {items.map((transaction) => (
+        <TransactionItem key={transaction.id} transaction={transaction} onDelete={handleDelete} />
       ))}
+
+      {nextCursor && (
+        <button
+          onClick={() => fetchPage(nextCursor)}
+          disabled={loading}
+          className="w-full bg-white border rounded-lg p-3 text-sm text-gray-600 hover:bg-gray-50 transition-colors"
+        >
+          {loading ? "Loading..." : "Load more"}
+        </button>
+      )}
     </div>
   )
 }
@@ -1,21 +1,29 @@
 "use client";
 
-import { createContext, useState, useEffect, type ReactNode } from "react";
-import type { Transaction } from "../types";
+import { createContext, useState, useEffect, useRef, type ReactNode } from "react";
+import type { Transaction, TransactionSummary } from "../types";
 import axios from "axios";
-import { setupAxiosInterceptors } from "../utils/tokenManager";
+import TokenManager, { setupAxiosInterceptors } from "../utils/tokenManager";
 
+export const EMPTY_SUMMARY: TransactionSummary = {
+  totals: { income: 0, expenses: 0, balance: 0, count: 0, income_count: 0 },
+  monthly: [],
+  categories: [],
+};
+
+// Lists are paged from the server by TransactionList; the context only holds the
+// aggregated summary, which is refetched after every mutation
 interface TransactionContextType {
-  transactions: Transaction[];
+  summary: TransactionSummary;
   addTransaction: (transaction: Omit<Transaction, "id">) => Promise<boolean>;
-  deleteTransaction: (id: string) => void;
+  deleteTransaction: (id: string) => Promise<void>;
   refreshTransactions: () => Promise<void>;
 }
 
 export const TransactionContext = createContext<TransactionContextType>({
-  transactions: [],
+  summary: EMPTY_SUMMARY,
   addTransaction: async () => false, // default fallback
-  deleteTransaction: () => {},
+  deleteTransaction: async () => {},
   refreshTransactions: async () => {},
 });
 
@@ -24,39 +32,67 @@ interface TransactionProviderProps {
 }
 
 export const TransactionProvider = ({ children }: TransactionProviderProps) => {
-  const [transactions, setTransactions] = useState<Transaction[]>([]);
+  const [summary, setSummary] = useState<TransactionSummary>(EMPTY_SUMMARY);
 
   // Setup axios interceptors only once when component mounts
   useEffect(() => {
     setupAxiosInterceptors(axios);
   }, []);
 
-  // Function to fetch transactions from the API
-  const fetchTransactions = async () => {
+  // Dashboard totals and chart series are aggregated on the server
+  const fetchSummary = async () => {
     try {
-      const response = await axios.get<{transactions: any[]}>("http://127.0.0.1:8000/transactions/");
-
-      // Convert the transaction data to match frontend format
-      const fetchedTransactions = response.data.transactions.map((t: any) => ({
-        id: t.id || Math.random().toString(), // Generate ID if not present
-        description: t.description,
-        amount: t.amount,
-        type: t.type,
-        category: t.category,
-        transaction_date: new Date(t.transaction_date)
-      }));
-
-      setTransactions(fetchedTransactions);
+      const response = await axios.get<TransactionSummary>("http://127.0.0.1:8000/transactions/summary");
+      setSummary(response.data);
     } catch (error) {
-      console.error("Error fetching transactions:", error);
-      // If there's an auth error, the interceptor will handle redirect to login
-      setTransactions([]);
+      console.error("Error fetching transaction summary:", error);
+      setSummary(EMPTY_SUMMARY);
     }
   };
 
-  // Fetch transactions when component mounts or when user logs in
+  // Fetch the summary when component mounts or when user logs in
   useEffect(() => {
-    fetchTransactions();
+    fetchSummary();
+  }, []);
+
+  // Live updates: changes made in other tabs or devices are pushed by the server,
+  // so open dashboards refresh without polling. Bursts are coalesced into one refetch.
+  const refreshTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  useEffect(() => {
+    let socket: WebSocket | null = null;
+    let reconnectTimer: ReturnType<typeof setTimeout> | null = null;
+    let retryDelay = 1000;
+    let closed = false;
+
+    const scheduleRefresh = () => {
+      if (refreshTimer.current) clearTimeout(refreshTimer.current);
+      refreshTimer.current = setTimeout(fetchSummary, 300);
+    };
+
+    const connect = () => {
+      const token = TokenManager.getInstance().getAccessToken();
+      if (!token) return;
+      socket = new WebSocket(`ws://127.0.0.1:8000/ws/transactions?token=${encodeURIComponent(token)}`);
+      socket.onopen = () => {
+        retryDelay = 1000;
+      };
+      socket.onmessage = scheduleRefresh;
+      socket.onclose = () => {
+        if (closed) return;
+        // Events may have been missed while disconnected; the refetch also renews an expired token
+        scheduleRefresh();
+        reconnectTimer = setTimeout(connect, retryDelay);
+        retryDelay = Math.min(retryDelay * 2, 30000);
+      };
+    };
+
+    connect();
+    return () => {
+      closed = true;
+      if (reconnectTimer) clearTimeout(reconnectTimer);
+      if (refreshTimer.current) clearTimeout(refreshTimer.current);
+      socket?.close();
+    };
   }, []);
 
   const addTransaction = async (transaction: Omit<Transaction, "id">): Promise<boolean> => {
@@ -77,7 +113,7 @@ export const TransactionProvider = ({ children }: TransactionProviderProps) => {
       
       console.log("Transaction created:", response.data.message);
       // Refresh transactions from the server after adding
-      await fetchTransactions();
+      await fetchSummary();
       return true;
     } catch (error) {
       console.error("Error adding transaction:", error);
@@ -88,12 +124,17 @@ export const TransactionProvider = ({ children }: TransactionProviderProps) => {
     }
   };
 
-  const deleteTransaction = (id: string) => {
-    setTransactions((prev) => prev.filter((t) => t.id !== id));
+  const deleteTransaction = async (id: string) => {
+    try {
+      await axios.delete(`http://127.0.0.1:8000/transactions/${id}`);
+      await fetchSummary();
+    } catch (error) {
+      console.error("Error deleting transaction:", error);
+    }
   };
 
   return (
-    <TransactionContext.Provider value={{ transactions, addTransaction, deleteTransaction, refreshTransactions: fetchTransactions }}>
+    <TransactionContext.Provider value={{ summary, addTransaction, deleteTransaction, refreshTransactions: fetchSummary }}>
       {children}
     </TransactionContext.Provider>
   );
@@ -8,19 +8,11 @@ import TransactionChart from "../components/TransactionChart";
 import { PlusCircle, TrendingUp, CheckCircle } from "lucide-react";
 
 const Dashboard = () => {
-  const { transactions } = useContext(TransactionContext);
+  const { summary } = useContext(TransactionContext);
   const [successMessage, setSuccessMessage] = useState("");
 
-  // Calculate totals
-  const income = transactions
-    .filter((t) => t.type === "income")
-    .reduce((acc, t) => acc + t.amount, 0);
-
-  const expenses = transactions
-    .filter((t) => t.type === "expense")
-    .reduce((acc, t) => acc + t.amount, 0);
-
-  const balance = income - expenses;
+  // Totals come pre-aggregated from GET /transactions/summary
+  const { income, expenses, balance } = summary.totals;
 
   const handleAddTransaction = () => {
     setSuccessMessage("Transaction saved!");
@@ -64,7 +56,7 @@ const Dashboard = () => {
                 <h2 className="text-2xl font-bold text-gray-800">Transaction History</h2>
               </div>
               <div className="bg-gradient-to-br from-gray-50 to-blue-50 rounded-xl p-6">
-                <TransactionChart transactions={transactions} />
+                <TransactionChart summary={summary} />
               </div>
             </div>
           </div>
@@ -106,12 +98,12 @@ const Dashboard = () => {
                 <div className="bg-gray-50 p-4 border-t border-gray-100">
                   <div className="grid grid-cols-2 gap-4 text-center">
                     <div>
-                      <p className="text-2xl font-bold text-gray-800">{transactions.length}</p>
+                      <p className="text-2xl font-bold text-gray-800">{summary.totals.count}</p>
                       <p className="text-xs text-gray-500 uppercase tracking-wide">Total Transactions</p>
                     </div>
                     <div>
                       <p className="text-2xl font-bold text-gray-800">
-                        {transactions.filter(t => t.type === 'income').length}
+                        {summary.totals.income_count}
                       </p>
                       <p className="text-xs text-gray-500 uppercase tracking-wide">Income Entries</p>
                     </div>
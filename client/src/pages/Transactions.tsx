@@ -1,9 +1,10 @@
 "use client";
 
-import { useState, useContext } from "react";
-import { TransactionContext } from "../context/TransactionContext";
+import { useState, useContext, useEffect } from "react";
+import axios from "axios";
+import { TransactionContext, EMPTY_SUMMARY } from "../context/TransactionContext";
 import TransactionList from "../components/TransactionList";
-import type { FilterOptions } from "../types";
+import type { FilterOptions, TransactionSummary } from "../types";
 import { 
   Receipt, 
   Filter, 
@@ -18,7 +19,7 @@ import {
 } from "lucide-react";
 
 const Transactions = () => {
-  const { transactions } = useContext(TransactionContext);
+  const { summary } = useContext(TransactionContext);
   const [filters, setFilters] = useState<FilterOptions>({
     type: "all",
     category: "all",
@@ -40,20 +41,22 @@ const Transactions = () => {
     });
   };
 
-  // Calculate filtered stats
-  const filteredTransactions = transactions.filter(transaction => {
-    if (filters.type !== "all" && transaction.type !== filters.type) return false;
-    if (filters.category !== "all" && transaction.category !== filters.category) return false;
-    return true;
-  });
+  // Filtered stats are aggregated on the server for the active filters
+  const [stats, setStats] = useState<TransactionSummary["totals"]>(EMPTY_SUMMARY.totals);
 
-  const totalIncome = filteredTransactions
-    .filter(t => t.type === "income")
-    .reduce((sum, t) => sum + t.amount, 0);
+  useEffect(() => {
+    const params = {
+      ...(filters.type !== "all" ? { type: filters.type } : {}),
+      ...(filters.category !== "all" ? { category: filters.category } : {}),
+    };
+    axios
+      .get<TransactionSummary>("http://127.0.0.1:8000/transactions/summary", { params })
+      .then((response) => setStats(response.data.totals))
+      .catch((error) => console.error("Error fetching transaction summary:", error));
+  }, [filters.type, filters.category, summary]);
 
-  const totalExpenses = filteredTransactions
-    .filter(t => t.type === "expense")
-    .reduce((sum, t) => sum + t.amount, 0);
+  const totalIncome = stats.income;
+  const totalExpenses = stats.expenses;
 
   return (
     <div className="min-h-screen bg-gradient-to-br from-slate-50 via-blue-50 to-indigo-50 py-8">
@@ -102,7 +105,7 @@ const Transactions = () => {
                 <div className="flex items-center justify-between">
                   <div>
                     <p className="text-blue-100 text-sm font-medium">Transactions</p>
-                    <p className="text-2xl font-bold">{filteredTransactions.length}</p>
+                    <p className="text-2xl font-bold">{stats.count}</p>
                   </div>
                   <Receipt className="h-8 w-8 text-blue-200" />
                 </div>
@@ -16,3 +16,27 @@ export interface FilterOptions {
   sortBy: "date" | "amount" | "category"
   sortOrder: "asc" | "desc"
 }
+
+export interface MonthlySummary {
+  month: string // YYYY-MM
+  income: number
+  expenses: number
+}
+
+export interface CategorySummary {
+  category: string
+  total: number
+  count: number
+}
+
+export interface TransactionSummary {
+  totals: {
+    income: number
+    expenses: number
+    balance: number
+    count: number
+    income_count: number
+  }
+  monthly: MonthlySummary[]
+  categories: CategorySummary[]
+}
@@ -1,33 +1,101 @@
 import jwt
 import bcrypt
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
+from app.cache import TTLCache
+from app.config import settings
+from app.metrics import jwt_verify_duration, password_hash_duration
 
 # Configuration
-SECRET_KEY = os.getenv("JWT_SECRET", "your-secret-key-change-this-in-production")
+SECRET_KEY = settings.jwt_secret
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 7
 
+# Verified token claims, keyed by SHA-256 of the token and kept until `exp`
+TOKEN_CACHE_MAX_SIZE = settings.token_cache_max_size
+token_cache = TTLCache(TOKEN_CACHE_MAX_SIZE, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# bcrypt cost factor; each +1 doubles hashing time
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+
+# Dedicated bcrypt workers and how many calls may wait for one before shedding load
+PASSWORD_HASH_WORKERS = settings.password_hash_workers
+PASSWORD_HASH_QUEUE_SIZE = settings.password_hash_queue_size
+
+class PasswordHashingBusy(Exception):
+    """Raised when the bcrypt worker pool and its queue are full"""
+
+class PasswordWorkerPool:
+    """Bounded thread pool for bcrypt work, kept apart from the shared request threadpool.
+
+    bcrypt releases the GIL while hashing, so threads give real parallelism.
+    At most `workers + queue_size` calls are admitted; beyond that callers get
+    PasswordHashingBusy instead of piling up behind a login spike.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def run(self, func, *args):
+        if self.pending >= self.workers + self.queue_size:
+            self.rejected += 1
+            raise PasswordHashingBusy("Password hashing queue is full")
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+password_pool = PasswordWorkerPool(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_SIZE)
+
 class PasswordManager:
     @staticmethod
     def hash_password(password: str) -> str:
         """Hash a password using bcrypt"""
-        salt = bcrypt.gensalt()
-        hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
+        with password_hash_duration.time(operation="hash"):
+            salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
+            hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
         return hashed.decode('utf-8')
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
         """Verify a password against its hash"""
-        return bcrypt.checkpw(
-            plain_password.encode('utf-8'), 
-            hashed_password.encode('utf-8')
-        )
+        with password_hash_duration.time(operation="verify"):
+            return bcrypt.checkpw(
+                plain_password.encode('utf-8'), 
+                hashed_password.encode('utf-8')
+            )
+    
+    @staticmethod
+    async def hash_password_async(password: str) -> str:
+        """Hash a password on the bcrypt worker pool"""
+        return await password_pool.run(PasswordManager.hash_password, password)
+    
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Verify a password on the bcrypt worker pool"""
+        return await password_pool.run(PasswordManager.verify_password, plain_password, hashed_password)
 
 class TokenManager:
     @staticmethod
@@ -53,24 +121,46 @@ class TokenManager:
         return encoded_jwt
     
     @staticmethod
-    def verify_token(token: str) -> Optional[dict]:
-        """Verify and decode JWT token"""
+    def verify_token(token: str, use_cache: bool = True) -> Optional[dict]:
+        """Verify and decode JWT token.
+
+        Verified claims are cached by token digest until the token's `exp`, so a
+        session re-sending the same token skips the HMAC check. Invalid tokens are
+        never cached.
+        """
+        started = time.perf_counter()
+        digest = hashlib.sha256(token.encode("utf-8")).digest()
+        if use_cache:
+            payload = token_cache.get(digest)
+            if payload is not None:
+                jwt_verify_duration.observe(time.perf_counter() - started, cached="true")
+                return payload
+
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
-        except jwt.ExpiredSignatureError:
-            return None
-        except jwt.JWTError:
+        except jwt.InvalidTokenError:
+            # Covers expired, malformed and badly signed tokens
             return None
+        finally:
+            jwt_verify_duration.observe(time.perf_counter() - started, cached="false")
+
+        ttl = payload.get("exp", 0) - time.time()
+        if use_cache and ttl > 0:
+            token_cache.set(digest, payload, ttl_seconds=ttl)
+        return payload
     
     @staticmethod
-    def get_current_user_id(token: str) -> Optional[str]:
-        """Extract user ID from token"""
-        payload = TokenManager.verify_token(token)
+    def user_id_from_payload(payload: Optional[dict]) -> Optional[str]:
+        """Extract user ID from already-verified access token claims"""
         if payload and payload.get("type") == "access":
             return payload.get("sub")
         return None
     
+    @staticmethod
+    def get_current_user_id(token: str) -> Optional[str]:
+        """Extract user ID from token"""
+        return TokenManager.user_id_from_payload(TokenManager.verify_token(token))
+    
     @staticmethod
     def verify_refresh_token(token: str) -> Optional[str]:
         """Extract user ID from refresh token"""
@@ -0,0 +1,94 @@
+"""Batch update/delete for PATCH /transactions/batch and POST /transactions/batch-delete.
+
+Matching rows are processed in chunks: each chunk's pre-images are read once
+(for per-item results and rollup deltas) and written with a single
+update_many/delete_many pinned to exactly those _ids, so rows inserted
+concurrently are never touched without their rollups being adjusted.
+"""
+from datetime import datetime
+from typing import List, Optional
+from bson import ObjectId
+from bson.errors import InvalidId
+from app import budgets, changes, rollups
+from app.database import collection
+
+CHUNK_SIZE = 1000
+
+
+def parse_ids(ids: List[str]) -> tuple:
+    """Split requested ids into ObjectIds and per-item results for invalid ones"""
+    object_ids, invalid = [], []
+    for raw in ids:
+        try:
+            object_ids.append(ObjectId(raw))
+        except (InvalidId, TypeError):
+            invalid.append({"id": raw, "status": "invalid_id"})
+    return object_ids, invalid
+
+
+async def _iter_chunks(user_id: str, query: dict):
+    """Yield pre-images of the matching rows, CHUNK_SIZE at a time.
+
+    Matching _ids are snapshotted first so that rows changed by an earlier
+    chunk can never be matched again by the same scan.
+    """
+    ids = [doc["_id"] async for doc in collection.find(query, {"_id": 1})]
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk_ids = ids[start:start + CHUNK_SIZE]
+        yield await collection.find({"_id": {"$in": chunk_ids}, "user_id": user_id}).to_list(length=None)
+
+
+async def batch_update(user_id: str, query: dict, update_data: dict) -> dict:
+    """Apply the same $set to every transaction matching query"""
+    matched = 0
+    modified = 0
+    found_ids = []
+    alerts = {}
+    async for chunk in _iter_chunks(user_id, query):
+        ids = [doc["_id"] for doc in chunk]
+        # Restamped per chunk so updated_at stays within the delta sync grace of the write
+        update_data = {**update_data, "updated_at": datetime.utcnow()}
+        result = await collection.update_many(
+            {"_id": {"$in": ids}, "user_id": user_id},
+            {"$set": update_data}
+        )
+        matched += result.matched_count
+        modified += result.modified_count
+        found_ids.extend(ids)
+
+        await rollups.apply_transactions(chunk, -1)
+        updated = [{**doc, **update_data} for doc in chunk]
+        rollup_docs = await rollups.apply_transactions(updated, 1, return_rollups=True)
+        # Keyed by (category, month) so the last chunk's totals win
+        for alert in await budgets.budget_alerts(updated, rollup_docs):
+            alerts[(alert["category"], alert["month"])] = alert
+
+    return {"matched": matched, "modified": modified, "ids": found_ids,
+            "budget_alerts": list(alerts.values())}
+
+
+async def batch_delete(user_id: str, query: dict) -> dict:
+    """Delete every transaction matching query"""
+    deleted = 0
+    found_ids = []
+    async for chunk in _iter_chunks(user_id, query):
+        ids = [doc["_id"] for doc in chunk]
+        result = await collection.delete_many({"_id": {"$in": ids}, "user_id": user_id})
+        deleted += result.deleted_count
+        found_ids.extend(ids)
+
+        await rollups.apply_transactions(chunk, -1)
+        await changes.record_deletes(user_id, ids)
+
+    return {"deleted": deleted, "ids": found_ids}
+
+
+def item_results(requested: List[ObjectId], found: List[ObjectId], status: str,
+                 invalid: Optional[list] = None) -> list:
+    """Per-id outcome for an id-list batch request"""
+    found_set = set(found)
+    results = [
+        {"id": str(oid), "status": status if oid in found_set else "not_found"}
+        for oid in requested
+    ]
+    return results + (invalid or [])
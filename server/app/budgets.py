@@ -0,0 +1,146 @@
+"""Per-category monthly budgets and overspend alerts.
+
+Spend counters are the monthly rollups: every transaction write already
+$incs its (user_id, month, category) rollup and gets the updated document
+back, so checking a budget on write is a comparison against a cached budget
+and costs no extra query. Bulk import, batch update and the recurring
+scheduler read their batch's rollups back with one query and check them the
+same way. GET /budgets/status reads one rollup per budget.
+
+Budgets are cached per user for BUDGET_CACHE_TTL_SECONDS. Edits made through
+another worker are seen once that worker's entry expires.
+
+Recompute the counters behind every budget from raw transactions with:
+
+    python -m app.budgets verify [--user USER_ID]
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional
+from app import database, rollups
+from app.cache import TTLCache
+from app.config import settings
+from app.database import budgets_collection, rollups_collection
+
+BUDGET_CACHE_TTL_SECONDS = settings.budget_cache_ttl_seconds
+
+budget_cache = TTLCache(settings.user_cache_max_size, BUDGET_CACHE_TTL_SECONDS)
+
+
+def current_month() -> str:
+    return rollups.month_key(datetime.utcnow())
+
+
+async def budgets_for_user(user_id: str) -> Dict[str, dict]:
+    """The user's budgets keyed by category"""
+    budgets = budget_cache.get(user_id)
+    if budgets is None:
+        documents = await budgets_collection.find({"user_id": user_id}).to_list(length=None)
+        budgets = {doc["category"]: doc for doc in documents}
+        budget_cache.set(user_id, budgets)
+    return budgets
+
+
+def evaluate(budget: dict, month: str, spent: float) -> dict:
+    """Budget status for one month's spend"""
+    limit = budget["monthly_limit"]
+    ratio = spent / limit
+    if ratio > 1:
+        state = "over"
+    elif ratio >= budget["alert_threshold"]:
+        state = "warning"
+    else:
+        state = "ok"
+    return {
+        "budget_id": str(budget["_id"]),
+        "category": budget["category"],
+        "month": month,
+        "monthly_limit": limit,
+        "spent": round(spent, 2),
+        "remaining": round(limit - spent, 2),
+        "ratio": round(ratio, 4),
+        "status": state,
+    }
+
+
+async def budget_alerts(transactions: List[dict], rollup_docs: List[dict]) -> List[dict]:
+    """Alerts for budgets that expense writes pushed to their threshold or over.
+
+    `rollup_docs` are the rollups the write returned; only those holding one
+    of the transactions' expenses are checked, so income and deletes never
+    alert.
+    """
+    expense_keys = {
+        tuple(rollups.rollup_key(transaction).values())
+        for transaction in transactions if transaction["type"] == "expense"
+    }
+    alerts = []
+    for doc in rollup_docs:
+        if (doc["user_id"], doc["month"], doc["category"]) not in expense_keys:
+            continue
+        budget = (await budgets_for_user(doc["user_id"])).get(doc["category"])
+        if budget is None:
+            continue
+        status = evaluate(budget, doc["month"], doc.get("expenses", 0))
+        if status["status"] != "ok":
+            alerts.append(status)
+    return alerts
+
+
+async def check_overspend(transaction: dict, rollup: Optional[dict]) -> Optional[dict]:
+    """Alert for the budget an expense write pushed to its threshold or over, else None.
+
+    `rollup` is the transaction's rollup document as returned by the write.
+    """
+    if rollup is None:
+        return None
+    alerts = await budget_alerts([transaction], [rollup])
+    return alerts[0] if alerts else None
+
+
+async def budget_status(user_id: str, month: str) -> List[dict]:
+    """Status of every budget the user has for `month`"""
+    budgets = await budgets_for_user(user_id)
+    if not budgets:
+        return []
+    spent = {
+        doc["category"]: doc.get("expenses", 0)
+        async for doc in rollups_collection.find(
+            {"user_id": user_id, "month": month, "category": {"$in": list(budgets)}},
+            {"category": 1, "expenses": 1},
+        )
+    }
+    return [evaluate(budget, month, spent.get(category, 0)) for category, budget in sorted(budgets.items())]
+
+
+async def verify_budget_counters(user_id: Optional[str] = None) -> List[tuple]:
+    """(user_id, month, category) counters behind a budget that disagree with raw transactions"""
+    match = {"user_id": user_id} if user_id else {}
+    budgeted = {(doc["user_id"], doc["category"]) async for doc in budgets_collection.find(match)}
+    mismatched = await rollups.verify_rollups(user_id)
+    return [key for key in mismatched if (key[0], key[2]) in budgeted]
+
+
+async def _main(user_id: Optional[str]) -> int:
+    await database.connect()
+    try:
+        mismatched = await verify_budget_counters(user_id)
+        if mismatched:
+            print(f"{len(mismatched)} budget spend counters do not match raw transactions:")
+            for user, month, category in mismatched:
+                print(f"  user={user} month={month} category={category}")
+            print("Repair with: python -m app.rollups rebuild")
+            return 1
+        print("Budget spend counters match raw transactions")
+        return 0
+    finally:
+        await database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check budget spend counters")
+    parser.add_argument("command", choices=["verify"])
+    parser.add_argument("--user", dest="user_id", help="Limit to a single user_id")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.user_id)))
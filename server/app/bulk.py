@@ -0,0 +1,249 @@
+"""Streaming CSV/NDJSON ingestion for POST /transactions/bulk.
+
+The request body is decoded and parsed chunk by chunk, rows are validated
+against TransactionCreate as they arrive and written in unordered
+insert_many batches, so memory stays bounded by the batch size rather than
+the upload size.
+"""
+import codecs
+import csv
+import json
+import re
+from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from app import budgets, rollups
+from app.database import collection
+from app.models.transaction import TransactionCreate
+
+BATCH_SIZE = 1000
+# Per-row errors beyond this are counted but not echoed back
+MAX_REPORTED_ERRORS = 1000
+
+CSV_COLUMNS = ("description", "amount", "type", "category", "transaction_date")
+
+# Longest line, and longest (possibly multi-line) CSV record, buffered before
+# the row is reported as failed; keeps memory bounded for inputs without
+# regular line breaks or with an unmatched quote
+MAX_LINE_LENGTH = 64 * 1024
+MAX_RECORD_LENGTH = 64 * 1024
+
+LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+class LineTooLong(ValueError):
+    """Yielded by iter_lines in place of a line longer than MAX_LINE_LENGTH"""
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[object]:
+    """Decode a byte stream incrementally and yield complete lines.
+
+    \\n, \\r\\n and bare \\r all end a line. A line longer than MAX_LINE_LENGTH
+    is discarded as it streams in and a LineTooLong error is yielded instead.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = []  # pieces of the unfinished line, joined once it completes
+    pending_length = 0
+    oversized = False
+    held_cr = ""
+
+    async for chunk in chunks:
+        text = held_cr + decoder.decode(chunk)
+        # A \r at the end of a chunk may be the first half of \r\n
+        held_cr = "\r" if text.endswith("\r") else ""
+        if held_cr:
+            text = text[:-1]
+
+        *lines, tail = LINE_BREAK.split(text)
+        for line in lines:
+            if oversized or pending_length + len(line) > MAX_LINE_LENGTH:
+                yield LineTooLong(f"Line exceeds {MAX_LINE_LENGTH} characters")
+            else:
+                pending.append(line)
+                yield "".join(pending)
+            pending, pending_length, oversized = [], 0, False
+
+        if not oversized:
+            pending.append(tail)
+            pending_length += len(tail)
+            if pending_length > MAX_LINE_LENGTH:
+                pending, oversized = [], True
+
+    tail = decoder.decode(b"", final=True)
+    if oversized:
+        yield LineTooLong(f"Line exceeds {MAX_LINE_LENGTH} characters")
+    elif pending_length + len(tail) > MAX_LINE_LENGTH:
+        yield LineTooLong(f"Line exceeds {MAX_LINE_LENGTH} characters")
+    else:
+        line = "".join(pending) + tail
+        if line:
+            yield line
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (row number, dict) for each CSV record after the header row.
+
+    A record may span several lines when a quoted field contains newlines; it is
+    complete once its quote count is even. A record still open after
+    MAX_RECORD_LENGTH characters is reported as failed and dropped.
+    """
+    header = None
+    row_number = 0
+    buffer = []
+    buffer_length = 0
+    quotes = 0
+    async for line in lines:
+        if isinstance(line, LineTooLong):
+            if header is None:
+                raise ValueError("CSV header line is too long")
+            buffer, buffer_length, quotes = [], 0, 0
+            row_number += 1
+            yield row_number, line
+            continue
+
+        buffer.append(line)
+        buffer_length += len(line) + 1
+        quotes += line.count('"')
+        if quotes % 2:
+            if buffer_length > MAX_RECORD_LENGTH:
+                if header is None:
+                    raise ValueError("CSV header has an unterminated quoted field")
+                buffer, buffer_length, quotes = [], 0, 0
+                row_number += 1
+                yield row_number, ValueError(
+                    f"Record exceeds {MAX_RECORD_LENGTH} characters or has an unterminated quoted field"
+                )
+            continue
+        record = "\n".join(buffer)
+        buffer, buffer_length, quotes = [], 0, 0
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [v.strip() for v in values]
+            missing = [c for c in CSV_COLUMNS if c not in header]
+            if missing:
+                raise ValueError(f"CSV header is missing columns: {', '.join(missing)}")
+            continue
+
+        row_number += 1
+        yield row_number, dict(zip(header, values))
+
+    if buffer:
+        row_number += 1
+        yield row_number, ValueError("Unterminated quoted field")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[str]) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (row number, dict) for each non-blank NDJSON line"""
+    row_number = 0
+    async for line in lines:
+        if isinstance(line, LineTooLong):
+            row_number += 1
+            yield row_number, line
+            continue
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, ValueError(f"Invalid JSON: {e.msg}")
+
+
+def to_document(transaction: TransactionCreate, user_id: str, now: datetime) -> dict:
+    """Build the stored document the same way create_transaction does"""
+    document = transaction.dict()
+    document["user_id"] = user_id
+    document["created_at"] = now
+    document["updated_at"] = now
+    document["transaction_date"] = datetime.combine(transaction.transaction_date, datetime.min.time())
+    return document
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+        # (category, month) -> latest alert, so a budget crossed by several batches is reported once
+        self.budget_alerts = {}
+
+    def add_error(self, row: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "budget_alerts": list(self.budget_alerts.values()),
+        }
+
+
+async def _flush(batch: list, rows: list, report: ImportReport):
+    """Insert one batch unordered, recording rows the server rejected"""
+    if not batch:
+        return
+    # Stamped per batch at write time: delta sync watermarks assume updated_at
+    # trails the write by at most SYNC_GRACE_SECONDS, however long the upload runs
+    now = datetime.utcnow()
+    for document in batch:
+        document["created_at"] = now
+        document["updated_at"] = now
+    try:
+        result = await collection.insert_many(batch, ordered=False)
+        inserted = batch
+        report.inserted += len(result.inserted_ids)
+    except BulkWriteError as e:
+        failed_indexes = set()
+        for error in e.details.get("writeErrors", []):
+            failed_indexes.add(error["index"])
+            report.add_error(rows[error["index"]], error.get("errmsg", "Write failed"))
+        inserted = [doc for i, doc in enumerate(batch) if i not in failed_indexes]
+        report.inserted += len(inserted)
+    updated = await rollups.apply_transactions(inserted, return_rollups=True)
+    for alert in await budgets.budget_alerts(inserted, updated):
+        report.budget_alerts[(alert["category"], alert["month"])] = alert
+
+
+async def import_transactions(user_id: str, chunks: AsyncIterator[bytes], format: str,
+                              batch_size: Optional[int] = None) -> dict:
+    """Validate and insert a streamed CSV or NDJSON upload for one user"""
+    batch_size = batch_size or BATCH_SIZE
+    parse = iter_csv_records if format == "csv" else iter_ndjson_records
+    report = ImportReport()
+    batch, rows = [], []
+    now = datetime.utcnow()
+
+    async for row, record in parse(iter_lines(chunks)):
+        report.processed += 1
+        if isinstance(record, Exception):
+            report.add_error(row, str(record))
+            continue
+        if not isinstance(record, dict):
+            report.add_error(row, "Row must be an object")
+            continue
+        try:
+            transaction = TransactionCreate(**record)
+        except ValidationError as e:
+            report.add_error(row, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            continue
+
+        batch.append(to_document(transaction, user_id, now))
+        rows.append(row)
+        if len(batch) >= batch_size:
+            await _flush(batch, rows, report)
+            batch, rows = [], []
+
+    await _flush(batch, rows, report)
+    return report.as_dict()
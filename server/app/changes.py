@@ -0,0 +1,132 @@
+"""Delta sync for GET /transactions/changes.
+
+Upserts are read from the transactions collection through the existing
+(user_id, updated_at, _id) index. Hard deletes leave a tombstone in the
+transaction_tombstones collection, which a TTL index expires after
+TOMBSTONE_TTL_SECONDS. A sync therefore costs O(changes since the watermark),
+not O(history).
+
+The watermark is an opaque token holding one (timestamp, _id) keyset
+position per stream. When a stream is caught up, its position is pulled
+back to SYNC_GRACE_SECONDS before the read started. Writes whose updated_at
+was stamped just before a concurrent sync, but which committed after it,
+are then picked up by the next sync. Those rows may be sent twice, so
+clients must apply upserts idempotently.
+
+This relies on every write path stamping updated_at (and deleted_at)
+immediately before its own write, one stamp per insert_many/update_many
+batch. A timestamp taken once at the start of a long bulk import, batch
+update or scheduler run would fall behind the watermark of a sync that
+ran meanwhile, and those rows would never be returned.
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import List, Optional
+from bson import ObjectId
+from app.config import settings
+from app.database import collection, tombstones_collection
+from app.pagination import keyset_filter
+
+TOMBSTONE_TTL_SECONDS = settings.tombstone_ttl_seconds
+SYNC_GRACE_SECONDS = settings.sync_grace_seconds
+MAX_CHANGES = 1000
+
+
+class WatermarkExpired(Exception):
+    """The watermark predates retained tombstones; the client must resync in full"""
+
+
+def _truncate_ms(value: datetime) -> datetime:
+    # BSON dates have millisecond precision
+    return value.replace(microsecond=value.microsecond // 1000 * 1000)
+
+
+def encode_watermark(positions: dict) -> str:
+    raw = json.dumps({
+        stream: [at.isoformat(), str(doc_id) if doc_id else None]
+        for stream, (at, doc_id) in positions.items()
+    })
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_watermark(token: str) -> Optional[dict]:
+    """Decode a watermark into {stream: (timestamp, _id or None)}, or None if malformed"""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+        return {
+            stream: (datetime.fromisoformat(raw[stream][0]), ObjectId(raw[stream][1]) if raw[stream][1] else None)
+            for stream in ("u", "d")
+        }
+    except Exception:
+        return None
+
+
+async def record_deletes(user_id: str, transaction_ids: List[ObjectId]):
+    """Leave a tombstone for each hard-deleted transaction"""
+    if not transaction_ids:
+        return
+    now = datetime.utcnow()
+    await tombstones_collection.insert_many(
+        [{"user_id": user_id, "transaction_id": tid, "deleted_at": now} for tid in transaction_ids],
+        ordered=False,
+    )
+
+
+def _after(field: str, position: tuple) -> dict:
+    at, doc_id = position
+    if doc_id is None:
+        return {field: {"$gt": at}}
+    return keyset_filter(field, at, doc_id, 1)
+
+
+async def _read_stream(target, user_id: str, field: str, position: tuple, limit: int, started: datetime):
+    """Next `limit` rows after position, and the position to resume from"""
+    query = {"$and": [{"user_id": user_id}, _after(field, position)]}
+    documents = await target.find(query).sort(
+        [(field, 1), ("_id", 1)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+    if has_more:
+        last = documents[-1]
+        return documents, (last[field], last["_id"]), True
+
+    # Caught up: resume from a little before this read began, but never go backwards
+    horizon = _truncate_ms(started - timedelta(seconds=SYNC_GRACE_SECONDS))
+    if documents and documents[-1][field] <= horizon:
+        last = documents[-1]
+        return documents, (last[field], last["_id"]), False
+    return documents, max(position, (horizon, None), key=lambda p: p[0]), False
+
+
+async def changes_since(user_id: str, token: Optional[str], limit: int = MAX_CHANGES) -> dict:
+    """Upserts and deleted ids after the watermark; without one, page through everything"""
+    started = datetime.utcnow()
+    if token is None:
+        # A full sync has nothing to delete on the client
+        positions = {"u": (datetime(1970, 1, 1), None), "d": (_truncate_ms(started), None)}
+    else:
+        positions = decode_watermark(token)
+        if positions is None:
+            raise ValueError("Invalid watermark")
+        if positions["d"][0] < started - timedelta(seconds=TOMBSTONE_TTL_SECONDS):
+            raise WatermarkExpired()
+
+    upserts, upsert_position, more_upserts = await _read_stream(
+        collection, user_id, "updated_at", positions["u"], limit, started
+    )
+    deletes, delete_position, more_deletes = await _read_stream(
+        tombstones_collection, user_id, "deleted_at", positions["d"], limit, started
+    )
+
+    for doc in upserts:
+        doc["id"] = str(doc.pop("_id"))
+
+    return {
+        "upserts": upserts,
+        "deleted": [str(doc["transaction_id"]) for doc in deletes],
+        "next": encode_watermark({"u": upsert_position, "d": delete_position}),
+        "has_more": more_upserts or more_deletes,
+    }
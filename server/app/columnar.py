@@ -0,0 +1,50 @@
+"""Columnar encoding for large transaction lists.
+
+Instead of a list of row objects that repeats every key, the payload holds
+one array per field; `type` and `category` are dictionary-encoded as integer
+codes into small lookup tables. The result is serialized with orjson straight
+into a Response, bypassing FastAPI's per-row jsonable_encoder pass.
+"""
+from typing import List, Optional
+import orjson
+from fastapi import Response
+
+COLUMNAR_MEDIA_TYPE = "application/vnd.budget-tracker.columnar+json"
+
+# Low-cardinality fields sent as codes into a per-response dictionary
+DICTIONARY_FIELDS = ("type", "category")
+
+
+def wants_columnar(accept: Optional[str], format: Optional[str]) -> bool:
+    """Columnar output is opt-in via ?format=columnar or the Accept header"""
+    return format == "columnar" or (accept is not None and COLUMNAR_MEDIA_TYPE in accept)
+
+
+def to_columns(documents: List[dict], fields: List[str]) -> dict:
+    """Transpose row documents into per-field arrays"""
+    columns = {field: [] for field in fields}
+    dictionaries = {field: [] for field in fields if field in DICTIONARY_FIELDS}
+    codes = {field: {} for field in dictionaries}
+
+    for doc in documents:
+        for field in fields:
+            value = doc.get(field)
+            if field in codes:
+                lookup = codes[field]
+                code = lookup.get(value)
+                if code is None:
+                    code = lookup[value] = len(dictionaries[field])
+                    dictionaries[field].append(value)
+                value = code
+            columns[field].append(value)
+
+    return {"count": len(documents), "columns": columns, "dictionaries": dictionaries}
+
+
+def columnar_response(
+    documents: List[dict], fields: List[str], next_cursor: Optional[str], headers: Optional[dict] = None
+) -> Response:
+    payload = to_columns(documents, fields)
+    payload["next_cursor"] = next_cursor
+    # orjson encodes datetimes natively as RFC 3339 strings
+    return Response(orjson.dumps(payload), media_type=COLUMNAR_MEDIA_TYPE, headers=headers)
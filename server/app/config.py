@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from dotenv import load_dotenv
+import os
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Database
+    mongodb_uri: str
+    mongodb_database: str
+    mongodb_max_pool_size: int
+    mongodb_min_pool_size: int
+    run_migrations_on_startup: bool
+
+    # Authentication
+    jwt_secret: str
+    bcrypt_rounds: int
+    password_hash_workers: int
+    password_hash_queue_size: int
+    token_cache_max_size: int
+
+    # Caching
+    user_cache_max_size: int
+    user_cache_ttl_seconds: float
+    budget_cache_ttl_seconds: float
+
+    # Sync
+    tombstone_ttl_seconds: int
+    sync_grace_seconds: float
+    live_queue_size: int
+
+    # Recurring transactions
+    recurring_scheduler_enabled: bool
+    recurring_interval_seconds: float
+
+    # Rate limiting
+    rate_limit_enabled: bool
+    rate_limits: str
+    rate_limit_max_keys: int
+    trusted_proxy_hops: int
+
+    # Instrumentation
+    slow_request_ms: float
+    slow_query_ms: float
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Read settings from the environment, after loading .env"""
+        load_dotenv()
+        env = os.getenv
+        return cls(
+            mongodb_uri=env("MONGODB_URI", "mongodb://localhost:27017/budget_tracker"),
+            mongodb_database=env("MONGODB_DATABASE", "budgetTracker"),
+            mongodb_max_pool_size=int(env("MONGODB_MAX_POOL_SIZE", "100")),
+            mongodb_min_pool_size=int(env("MONGODB_MIN_POOL_SIZE", "0")),
+            run_migrations_on_startup=env("RUN_MIGRATIONS_ON_STARTUP", "false").lower() in ("1", "true", "yes"),
+            jwt_secret=env("JWT_SECRET", "your-secret-key-change-this-in-production"),
+            bcrypt_rounds=int(env("BCRYPT_ROUNDS", "12")),
+            password_hash_workers=int(env("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+            password_hash_queue_size=int(env("PASSWORD_HASH_QUEUE_SIZE", "64")),
+            token_cache_max_size=int(env("TOKEN_CACHE_MAX_SIZE", "10000")),
+            user_cache_max_size=int(env("USER_CACHE_MAX_SIZE", "10000")),
+            user_cache_ttl_seconds=float(env("USER_CACHE_TTL_SECONDS", "60")),
+            budget_cache_ttl_seconds=float(env("BUDGET_CACHE_TTL_SECONDS", "30")),
+            tombstone_ttl_seconds=int(env("TOMBSTONE_TTL_SECONDS", str(30 * 24 * 3600))),
+            sync_grace_seconds=float(env("SYNC_GRACE_SECONDS", "5")),
+            live_queue_size=int(env("LIVE_QUEUE_SIZE", "256")),
+            recurring_scheduler_enabled=env("RECURRING_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes"),
+            recurring_interval_seconds=float(env("RECURRING_INTERVAL_SECONDS", "60")),
+            rate_limit_enabled=env("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes"),
+            rate_limits=env("RATE_LIMITS", ""),
+            rate_limit_max_keys=int(env("RATE_LIMIT_MAX_KEYS", "100000")),
+            trusted_proxy_hops=int(env("TRUSTED_PROXY_HOPS", "0")),
+            slow_request_ms=float(env("SLOW_REQUEST_MS", "500")),
+            slow_query_ms=float(env("SLOW_QUERY_MS", "100")),
+        )
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings are loaded once per process"""
+    return Settings.from_env()
+
+
+settings = get_settings()
@@ -1,29 +1,66 @@
-from pymongo import MongoClient
-from dotenv import load_dotenv
-import os
+from pymongo import AsyncMongoClient
+from typing import Optional
+from app.config import settings
+from app.metrics import command_listener
 
-load_dotenv()
+MONGO_URI = settings.mongodb_uri
+DATABASE_NAME = settings.mongodb_database
 
-MONGO_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017/budget_tracker")
+# Connection pool configuration
+MONGODB_MAX_POOL_SIZE = settings.mongodb_max_pool_size
+MONGODB_MIN_POOL_SIZE = settings.mongodb_min_pool_size
+
+client: Optional[AsyncMongoClient] = None
+
+
+class CollectionProxy:
+    """Forward attribute access to a collection on the currently open client.
+
+    Lets modules keep importing ``collection``/``users_collection`` at import
+    time while the client itself is only created in the app lifespan.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+
+    def __getattr__(self, attr):
+        if client is None:
+            raise RuntimeError("Database client is not connected; call connect() first")
+        return getattr(client[DATABASE_NAME][self._name], attr)
 
-client = MongoClient(MONGO_URI)
-db = client["budgetTracker"]  # Database name
 
 # Collections
-collection = db["transactions"]  # Transactions collection
-users_collection = db["users"]   # Users collection
-
-# Create indexes for better performance
-try:
-    # Create unique index on email for users
-    users_collection.create_index("email", unique=True)
-    
-    # Create index on user_id for transactions (for user-specific queries)
-    collection.create_index("user_id")
-    
-    # Create compound index for user transactions by date
-    collection.create_index([("user_id", 1), ("transaction_date", -1)])
-    
-    print("Database indexes created successfully")
-except Exception as e:
-    print(f"Index creation failed or already exists: {e}")
\ No newline at end of file
+collection = CollectionProxy("transactions")  # Transactions collection
+users_collection = CollectionProxy("users")   # Users collection
+rollups_collection = CollectionProxy("monthly_rollups")  # Per-user monthly totals
+migrations_collection = CollectionProxy("schema_migrations")  # Applied migration versions
+versions_collection = CollectionProxy("data_versions")  # Per-user transaction data versions
+tombstones_collection = CollectionProxy("transaction_tombstones")  # Deleted ids for delta sync
+budgets_collection = CollectionProxy("budgets")  # Per-category monthly budgets
+recurring_collection = CollectionProxy("recurring_rules")  # Recurring transaction rules
+leases_collection = CollectionProxy("scheduler_leases")  # Background job leases
+
+
+async def connect():
+    """Create the shared async client.
+
+    No I/O happens here: the pool connects on first use, so a slow MongoDB
+    never delays worker startup. Indexes are managed by app.migrations.
+    """
+    global client
+    if client is None:
+        client = AsyncMongoClient(
+            MONGO_URI,
+            maxPoolSize=MONGODB_MAX_POOL_SIZE,
+            minPoolSize=MONGODB_MIN_POOL_SIZE,
+            event_listeners=[command_listener],
+        )
+    return client
+
+
+async def close():
+    """Close the shared async client"""
+    global client
+    if client is not None:
+        await client.close()
+        client = None
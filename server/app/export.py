@@ -0,0 +1,78 @@
+"""Streaming CSV/NDJSON export for GET /transactions/export.
+
+Rows are pulled from the MongoDB cursor in batches and encoded (and
+optionally gzipped) one batch at a time, so peak memory is bounded by the
+batch size rather than the number of exported rows.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator
+from app.database import collection
+
+BATCH_SIZE = 1000
+
+EXPORT_FIELDS = (
+    "id",
+    "description",
+    "amount",
+    "type",
+    "category",
+    "transaction_date",
+    "created_at",
+    "updated_at",
+)
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _row(doc: dict) -> dict:
+    row = {"id": str(doc["_id"])}
+    for field in EXPORT_FIELDS[1:]:
+        value = doc.get(field)
+        row[field] = value.isoformat() if isinstance(value, datetime) else value
+    return row
+
+
+def _encode_csv(rows: list, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode_ndjson(rows: list) -> bytes:
+    return "".join(json.dumps(row) + "\n" for row in rows).encode("utf-8")
+
+
+async def iter_export(query: dict, format: str, batch_size: int = BATCH_SIZE) -> AsyncIterator[bytes]:
+    """Yield the encoded export one cursor batch at a time"""
+    cursor = collection.find(query).sort([("transaction_date", 1), ("_id", 1)]).batch_size(batch_size)
+
+    rows = []
+    first = True
+    async for doc in cursor:
+        rows.append(_row(doc))
+        if len(rows) >= batch_size:
+            yield _encode_csv(rows, first) if format == "csv" else _encode_ndjson(rows)
+            rows, first = [], False
+
+    if rows or (first and format == "csv"):
+        yield _encode_csv(rows, first) if format == "csv" else _encode_ndjson(rows)
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Compress a byte stream on the fly into a single gzip member"""
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,208 @@
+"""Server-push transaction events for the /ws/transactions WebSocket.
+
+Each worker runs one MongoDB change stream over the database and fans its
+events out in-process to the connected sockets of the affected user. Inserts
+and updates come from the transactions collection. Deletes come from inserts
+into transaction_tombstones, which carry the user_id that a delete event on
+transactions would lack. Change streams need a replica set; on a standalone
+server the consumer logs the failure and retries with backoff.
+
+Every connection has a bounded queue. A consumer that falls LIVE_QUEUE_SIZE
+events behind is disconnected with close code 1013, so the client can
+resync via /transactions/changes rather than the worker buffering without
+bound. If the stream cannot resume from its last token (for example, the
+oplog has rolled past it), it restarts from the present and every
+connection is closed the same way, since events in between were lost.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Set
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect
+from pymongo.errors import OperationFailure, PyMongoError
+from app import database
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+LIVE_QUEUE_SIZE = settings.live_queue_size
+MAX_RETRY_DELAY_SECONDS = 30
+# The resume token has fallen off the oplog
+CHANGE_STREAM_HISTORY_LOST = 286
+
+# Close codes sent to clients
+CLOSE_TRY_AGAIN_LATER = 1013
+CLOSE_POLICY_VIOLATION = 1008
+
+# Placed on a queue in place of further events once its consumer falls behind
+_DROPPED = object()
+
+_WATCH_PIPELINE = [
+    {"$match": {"$or": [
+        {"ns.coll": "transactions", "operationType": {"$in": ["insert", "update", "replace"]}},
+        {"ns.coll": "transaction_tombstones", "operationType": "insert"},
+    ]}},
+    {"$project": {"operationType": 1, "ns": 1, "fullDocument": 1}},
+]
+
+
+def _default(value):
+    return str(value)
+
+
+def to_event(change: dict) -> Optional[tuple]:
+    """(user_id, encoded message) for a change stream event, or None to skip it"""
+    doc = change.get("fullDocument")
+    if doc is None:
+        # Updated and then deleted before the lookup; the tombstone follows
+        return None
+
+    if change["ns"]["coll"] == "transaction_tombstones":
+        message = {"op": "delete", "id": str(doc["transaction_id"])}
+    else:
+        doc = dict(doc)
+        transaction_id = str(doc.pop("_id"))
+        op = "insert" if change["operationType"] == "insert" else "update"
+        message = {"op": op, "id": transaction_id, "transaction": doc}
+
+    # Encoded once here, not once per subscriber
+    return doc["user_id"], orjson.dumps(message, default=_default).decode()
+
+
+class LiveUpdates:
+    """Single shared change-stream consumer with per-user fan-out"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    @property
+    def connections(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(self.queue_size)
+        self._subscribers.setdefault(user_id, set()).add(queue)
+        # The stream starts with the first subscriber and runs until shutdown
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._consume())
+        return queue
+
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[user_id]
+
+    def _drop(self, user_id: str, queue: asyncio.Queue):
+        # Replace the backlog with a drop marker; the connection closes on it
+        self.unsubscribe(user_id, queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(_DROPPED)
+        self.dropped += 1
+
+    def publish(self, user_id: str, message: str):
+        for queue in list(self._subscribers.get(user_id, ())):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(user_id, queue)
+
+    def drop_all(self):
+        """Disconnect every subscriber, e.g. after events were lost, so clients resync"""
+        for user_id, queues in list(self._subscribers.items()):
+            for queue in list(queues):
+                self._drop(user_id, queue)
+
+    async def _consume(self):
+        delay = 1
+        resume_token = None
+        while True:
+            try:
+                db = database.client[database.DATABASE_NAME]
+                async with await db.watch(
+                    _WATCH_PIPELINE, full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    delay = 1
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        event = to_event(change)
+                        if event is not None:
+                            self.publish(*event)
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # pymongo resumes resumable errors itself; what reaches us cannot be
+                # resumed, and retrying with the same token would fail forever
+                if resume_token is not None or e.code == CHANGE_STREAM_HISTORY_LOST:
+                    logger.warning("Transaction change stream cannot resume, restarting from now: %s", e)
+                    resume_token = None
+                    self.drop_all()
+                else:
+                    logger.warning("Transaction change stream failed, retrying in %ss: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+            except PyMongoError as e:
+                logger.warning("Transaction change stream failed, retrying in %ss: %s", delay, e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY_SECONDS)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+live_updates = LiveUpdates(LIVE_QUEUE_SIZE)
+
+
+async def _wait_for_disconnect(websocket: WebSocket):
+    # Clients only listen; anything they send is ignored
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+
+
+async def stream_events(websocket: WebSocket, user_id: str, expires_at: float):
+    """Forward the user's events until they disconnect, fall behind or their token expires"""
+    queue = live_updates.subscribe(user_id)
+    disconnected = asyncio.create_task(_wait_for_disconnect(websocket))
+    try:
+        while True:
+            remaining = expires_at - time.time()
+            if remaining <= 0:
+                await websocket.close(code=CLOSE_POLICY_VIOLATION, reason="Token expired")
+                return
+
+            next_message = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait(
+                {next_message, disconnected}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            if next_message not in done:
+                next_message.cancel()
+                if disconnected in done:
+                    return
+                continue
+
+            message = next_message.result()
+            if message is _DROPPED:
+                await websocket.close(code=CLOSE_TRY_AGAIN_LATER, reason="Too far behind; resync")
+                return
+            await websocket.send_text(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        disconnected.cancel()
+        live_updates.unsubscribe(user_id, queue)
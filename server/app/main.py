@@ -1,19 +1,60 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Request, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.database import collection, users_collection
-from app.models.transaction import Transaction, TransactionCreate, TransactionUpdate
+from contextlib import asynccontextmanager
+from app import budgets, changes, database, migrations, recurring, rollups, versioning
+from app.config import settings
+from app.database import budgets_collection, collection, recurring_collection, users_collection
+from app.models.transaction import Transaction, TransactionCreate, TransactionUpdate, TransactionFilter, TransactionBatchUpdate, TransactionBatchDelete
+from app.models.budget import BudgetCreate, BudgetUpdate
+from app.models.recurring import RecurringRuleCreate, RecurringRuleUpdate
 from app.models.user import User, UserCreate, UserLogin, UserResponse, UserUpdate, PasswordChange, RefreshTokenRequest, TokenResponse
-from app.auth import PasswordManager, TokenManager
-from datetime import datetime
-from typing import Optional
+from app.auth import PasswordHashingBusy, PasswordManager, TokenManager, password_pool, token_cache
+from app.cache import active_user_cache
+from app.live import CLOSE_POLICY_VIOLATION, live_updates, stream_events
+from app.metrics import Gauge, RequestTimingMiddleware, registry
+from app.ratelimit import RATE_LIMITS, RateLimitMiddleware, bucket_store
+from app.batch import batch_delete, batch_update, item_results, parse_ids
+from app.bulk import import_transactions
+from app.columnar import columnar_response, wants_columnar
+from app.export import MEDIA_TYPES as EXPORT_MEDIA_TYPES, gzip_stream, iter_export
+from app.search import MAX_SEARCH_LIMIT, MAX_SUGGESTIONS, suggestion_pipeline, text_search_query
+from app.summary import build_summary_pipeline, format_summary
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, SORT_FIELDS, TRANSACTION_FIELDS, build_projection, decode_cursor, encode_cursor, keyset_filter
+from datetime import date, datetime
+from typing import List, Literal, Optional
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-app = FastAPI(title="Budget Tracker API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create the MongoDB client on startup and close it on shutdown
+    await database.connect()
+    if settings.run_migrations_on_startup:
+        # Index steps only; data backfills need writes stopped and run from the CLI
+        await migrations.migrate_on_startup(recurring.scheduler.owner)
+    if settings.recurring_scheduler_enabled:
+        recurring.scheduler.start()
+    try:
+        yield
+    finally:
+        await recurring.scheduler.stop()
+        await live_updates.stop()
+        password_pool.shutdown()
+        await database.close()
+
+app = FastAPI(title="Budget Tracker API", version="1.0.0", lifespan=lifespan)
 
 # Security
 security = HTTPBearer()
 
+# Token-bucket limits per client address or user; inside CORS so 429s carry CORS headers
+if settings.rate_limit_enabled:
+    app.add_middleware(RateLimitMiddleware, limits=RATE_LIMITS, store=bucket_store)
+
 # CORS configuration
 app.add_middleware(
     CORSMiddleware,
@@ -23,9 +64,50 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers including Authorization
 )
 
+@app.exception_handler(PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: PasswordHashingBusy):
+    # Shed load instead of queueing unbounded bcrypt work behind a login spike
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+# Per-route latency histograms and slow-request logging
+app.add_middleware(RequestTimingMiddleware)
+
+def _cache_samples() -> dict:
+    samples = {}
+    for cache_name, cache in (
+        ("active_users", active_user_cache), ("tokens", token_cache), ("budgets", budgets.budget_cache)
+    ):
+        stats = cache.stats()
+        for stat in ("hits", "misses", "size"):
+            samples[(cache_name, stat)] = stats[stat]
+    return samples
+
+registry.register(Gauge("cache_stats", "Per-worker cache hits, misses and size", ("cache", "stat"), _cache_samples))
+registry.register(Gauge(
+    "password_pool_stats", "bcrypt worker pool pending and rejected calls", ("stat",),
+    lambda: {("pending",): password_pool.pending, ("rejected",): password_pool.rejected},
+))
+registry.register(Gauge(
+    "rate_limit_stats", "Tracked rate-limit buckets and requests answered with 429", ("stat",),
+    lambda: {("buckets",): len(bucket_store), ("limited",): bucket_store.limited},
+))
+registry.register(Gauge(
+    "live_updates_stats", "Open /ws/transactions connections and slow consumers dropped", ("stat",),
+    lambda: {("connections",): live_updates.connections, ("dropped",): live_updates.dropped},
+))
+
+# Dependency to decode the bearer token; FastAPI caches it per request,
+# so every dependency in the chain shares a single decode
+async def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Optional[dict]:
+    return TokenManager.verify_token(credentials.credentials)
+
 # Dependency to get current user from token
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
-    user_id = TokenManager.get_current_user_id(credentials.credentials)
+async def get_current_user(payload: Optional[dict] = Depends(get_token_payload)) -> str:
+    user_id = TokenManager.user_id_from_payload(payload)
     if not user_id:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,33 +115,125 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Check if user exists and is active
-    user = users_collection.find_one({"_id": ObjectId(user_id), "is_active": True})
-    if not user:
+    if not await is_active_user(user_id):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive"
         )
-    
     return user_id
 
+async def is_active_user(user_id: str) -> bool:
+    # Check if user exists and is active; only positive results are cached
+    if active_user_cache.get(user_id):
+        return True
+
+    user = await users_collection.find_one({"_id": ObjectId(user_id), "is_active": True}, {"_id": 1})
+    if not user:
+        return False
+
+    active_user_cache.set(user_id, True)
+    return True
+
+def build_transaction_filter(
+    user_id: str,
+    type: Optional[str] = None,
+    category: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+) -> dict:
+    """Build a MongoDB filter for a user's transactions from optional list filters"""
+    query = {"user_id": user_id}
+    if type:
+        query["type"] = type
+    if category:
+        query["category"] = category
+
+    date_range = {}
+    if start_date:
+        date_range["$gte"] = datetime.combine(start_date, datetime.min.time())
+    if end_date:
+        date_range["$lte"] = datetime.combine(end_date, datetime.min.time())
+    if date_range:
+        query["transaction_date"] = date_range
+
+    amount_range = {}
+    if min_amount is not None:
+        amount_range["$gte"] = min_amount
+    if max_amount is not None:
+        amount_range["$lte"] = max_amount
+    if amount_range:
+        query["amount"] = amount_range
+
+    return query
+
+def build_transaction_update(transaction_update: TransactionUpdate) -> dict:
+    """Build the $set document for a transaction update"""
+    update_data = {k: v for k, v in transaction_update.dict(exclude_unset=True).items() if v is not None}
+    
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No data provided for update")
+    
+    # Convert date to datetime if provided
+    if 'transaction_date' in update_data:
+        update_data['transaction_date'] = datetime.combine(
+            update_data['transaction_date'], datetime.min.time()
+        )
+    
+    update_data['updated_at'] = datetime.utcnow()
+    return update_data
+
+def build_batch_query(user_id: str, ids: Optional[List[str]], filter: Optional[TransactionFilter]) -> tuple:
+    """Resolve a batch request's ids or filter into (query, requested ObjectIds, invalid id results)"""
+    if (ids is None) == (filter is None):
+        raise HTTPException(status_code=400, detail="Provide exactly one of ids or filter")
+
+    if ids is not None:
+        object_ids, invalid = parse_ids(ids)
+        return {"_id": {"$in": object_ids}, "user_id": user_id}, object_ids, invalid
+
+    if not filter.has_criteria() and not filter.all:
+        raise HTTPException(
+            status_code=400,
+            detail="Filter matches every transaction; add a criterion or set \"all\": true"
+        )
+    query = build_transaction_filter(
+        user_id, filter.type, filter.category, filter.start_date, filter.end_date
+    )
+    return query, None, []
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to the Budget Tracker API"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    # Prometheus text exposition format for this worker
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/cache")
+async def get_cache_stats():
+    # Hit/miss counters for the per-worker caches
+    return {
+        "active_users": active_user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "budgets": budgets.budget_cache.stats(),
+    }
+
 # ===== USER AUTHENTICATION ENDPOINTS =====
 
 @app.post("/auth/register", response_model=UserResponse)
-def register_user(user_data: UserCreate):
+async def register_user(user_data: UserCreate):
     # Check if user already exists
-    if users_collection.find_one({"email": user_data.email}):
+    if await users_collection.find_one({"email": user_data.email}):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
     # Hash password and create user
-    hashed_password = PasswordManager.hash_password(user_data.password)
+    hashed_password = await PasswordManager.hash_password_async(user_data.password)
     
     user_dict = {
         "email": user_data.email,
@@ -74,7 +248,7 @@ def register_user(user_data: UserCreate):
         "last_login": None
     }
     
-    result = users_collection.insert_one(user_dict)
+    result = await users_collection.insert_one(user_dict)
     user_dict["_id"] = result.inserted_id
     
     # Create response
@@ -91,9 +265,9 @@ def register_user(user_data: UserCreate):
     )
 
 @app.post("/auth/login", response_model=dict)
-def login_user(user_credentials: UserLogin):
+async def login_user(user_credentials: UserLogin):
     # Find user by email
-    user = users_collection.find_one({"email": user_credentials.email})
+    user = await users_collection.find_one({"email": user_credentials.email})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -101,7 +275,7 @@ def login_user(user_credentials: UserLogin):
         )
     
     # Verify password
-    if not PasswordManager.verify_password(user_credentials.password, user["password"]):
+    if not await PasswordManager.verify_password_async(user_credentials.password, user["password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -115,7 +289,7 @@ def login_user(user_credentials: UserLogin):
         )
     
     # Update last login
-    users_collection.update_one(
+    await users_collection.update_one(
         {"_id": user["_id"]},
         {"$set": {"last_login": datetime.utcnow(), "updated_at": datetime.utcnow()}}
     )
@@ -143,7 +317,7 @@ def login_user(user_credentials: UserLogin):
     }
 
 @app.post("/auth/refresh", response_model=TokenResponse)
-def refresh_access_token(refresh_request: RefreshTokenRequest):
+async def refresh_access_token(refresh_request: RefreshTokenRequest):
     """
     Endpoint to refresh access token using refresh token
     """
@@ -156,7 +330,7 @@ def refresh_access_token(refresh_request: RefreshTokenRequest):
         )
     
     # Check if user exists and is active
-    user = users_collection.find_one({"_id": ObjectId(user_id), "is_active": True})
+    user = await users_collection.find_one({"_id": ObjectId(user_id), "is_active": True})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -168,7 +342,7 @@ def refresh_access_token(refresh_request: RefreshTokenRequest):
     new_refresh_token = TokenManager.create_refresh_token(data={"sub": user_id})
     
     # Update last login time
-    users_collection.update_one(
+    await users_collection.update_one(
         {"_id": ObjectId(user_id)},
         {"$set": {"last_login": datetime.utcnow(), "updated_at": datetime.utcnow()}}
     )
@@ -181,8 +355,8 @@ def refresh_access_token(refresh_request: RefreshTokenRequest):
     )
 
 @app.get("/auth/me", response_model=UserResponse)
-def get_current_user_info(current_user_id: str = Depends(get_current_user)):
-    user = users_collection.find_one({"_id": ObjectId(current_user_id)})
+async def get_current_user_info(current_user_id: str = Depends(get_current_user)):
+    user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -199,7 +373,7 @@ def get_current_user_info(current_user_id: str = Depends(get_current_user)):
     )
 
 @app.put("/auth/profile", response_model=UserResponse)
-def update_user_profile(user_update: UserUpdate, current_user_id: str = Depends(get_current_user)):
+async def update_user_profile(user_update: UserUpdate, current_user_id: str = Depends(get_current_user)):
     update_data = {k: v for k, v in user_update.dict(exclude_unset=True).items() if v is not None}
     
     if not update_data:
@@ -207,7 +381,7 @@ def update_user_profile(user_update: UserUpdate, current_user_id: str = Depends(
     
     # Check if email is being updated and if it's already taken
     if "email" in update_data:
-        existing_user = users_collection.find_one({
+        existing_user = await users_collection.find_one({
             "email": update_data["email"], 
             "_id": {"$ne": ObjectId(current_user_id)}
         })
@@ -216,16 +390,19 @@ def update_user_profile(user_update: UserUpdate, current_user_id: str = Depends(
     
     update_data["updated_at"] = datetime.utcnow()
     
-    result = users_collection.update_one(
+    result = await users_collection.update_one(
         {"_id": ObjectId(current_user_id)},
         {"$set": update_data}
     )
     
+    # Profile changes may deactivate the account
+    active_user_cache.invalidate(current_user_id)
+
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Return updated user
-    updated_user = users_collection.find_one({"_id": ObjectId(current_user_id)})
+    updated_user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
     return UserResponse(
         id=str(updated_user["_id"]),
         email=updated_user["email"],
@@ -239,29 +416,46 @@ def update_user_profile(user_update: UserUpdate, current_user_id: str = Depends(
     )
 
 @app.post("/auth/change-password")
-def change_password(password_data: PasswordChange, current_user_id: str = Depends(get_current_user)):
-    user = users_collection.find_one({"_id": ObjectId(current_user_id)})
+async def change_password(password_data: PasswordChange, current_user_id: str = Depends(get_current_user)):
+    user = await users_collection.find_one({"_id": ObjectId(current_user_id)})
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Verify current password
-    if not PasswordManager.verify_password(password_data.current_password, user["password"]):
+    if not await PasswordManager.verify_password_async(password_data.current_password, user["password"]):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
     
     # Hash new password and update
-    new_hashed_password = PasswordManager.hash_password(password_data.new_password)
+    new_hashed_password = await PasswordManager.hash_password_async(password_data.new_password)
     
-    users_collection.update_one(
+    await users_collection.update_one(
         {"_id": ObjectId(current_user_id)},
         {"$set": {"password": new_hashed_password, "updated_at": datetime.utcnow()}}
     )
+    active_user_cache.invalidate(current_user_id)
     
     return {"message": "Password changed successfully"}
 
+@app.websocket("/ws/transactions")
+async def transaction_updates(websocket: WebSocket, token: str = Query(...)):
+    """
+    Push the user's transaction inserts, updates and deletes as JSON messages.
+
+    Browsers cannot set headers on a WebSocket, so the access token is passed as ?token=.
+    """
+    payload = TokenManager.verify_token(token)
+    user_id = TokenManager.user_id_from_payload(payload)
+    if not user_id or not await is_active_user(user_id):
+        await websocket.close(code=CLOSE_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    await stream_events(websocket, user_id, payload["exp"])
+
 # ===== TRANSACTION ENDPOINTS (Updated for user authentication) =====
 
 @app.post("/transactions/")
-def create_transaction(transaction: TransactionCreate, current_user_id: str = Depends(get_current_user)):
+async def create_transaction(transaction: TransactionCreate, current_user_id: str = Depends(get_current_user)):
     transaction_dict = transaction.dict()
     transaction_dict['user_id'] = current_user_id
     transaction_dict['created_at'] = datetime.utcnow()
@@ -272,24 +466,257 @@ def create_transaction(transaction: TransactionCreate, current_user_id: str = De
         transaction.transaction_date, datetime.min.time()
     )
 
-    result = collection.insert_one(transaction_dict)
-    return {"message": "Transaction created", "id": str(result.inserted_id)}
+    result = await collection.insert_one(transaction_dict)
+    rollup = await rollups.apply_transaction(transaction_dict)
+    await versioning.bump_version(current_user_id)
+
+    response = {"message": "Transaction created", "id": str(result.inserted_id)}
+    alert = await budgets.check_overspend(transaction_dict, rollup)
+    if alert:
+        response["budget_alert"] = alert
+    return response
+
+@app.post("/transactions/bulk")
+async def bulk_import_transactions(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="Defaults to the request Content-Type"),
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    Import transactions from a streamed CSV or NDJSON request body
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass ?format="
+            )
+
+    try:
+        return await import_transactions(current_user_id, request.stream(), format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        # Batches may have been written even if the import stopped early
+        await versioning.bump_version(current_user_id)
+
+@app.patch("/transactions/batch")
+async def batch_update_transactions(batch: TransactionBatchUpdate, current_user_id: str = Depends(get_current_user)):
+    """
+    Apply one update to a list of transaction IDs or to every transaction matching a filter
+    """
+    query, requested, invalid = build_batch_query(current_user_id, batch.ids, batch.filter)
+    update_data = build_transaction_update(batch.update)
+    result = await batch_update(current_user_id, query, update_data)
+    if result["modified"]:
+        await versioning.bump_version(current_user_id)
+
+    response = {"matched": result["matched"], "modified": result["modified"]}
+    if requested is not None:
+        response["results"] = item_results(requested, result["ids"], "updated", invalid)
+    if result["budget_alerts"]:
+        response["budget_alerts"] = result["budget_alerts"]
+    return response
+
+@app.post("/transactions/batch-delete")
+async def batch_delete_transactions(batch: TransactionBatchDelete, current_user_id: str = Depends(get_current_user)):
+    """
+    Delete a list of transaction IDs or every transaction matching a filter
+    """
+    query, requested, invalid = build_batch_query(current_user_id, batch.ids, batch.filter)
+    result = await batch_delete(current_user_id, query)
+    if result["deleted"]:
+        await versioning.bump_version(current_user_id)
+
+    response = {"deleted": result["deleted"]}
+    if requested is not None:
+        response["results"] = item_results(requested, result["ids"], "deleted", invalid)
+    return response
 
 @app.get("/transactions/")
-def get_transactions(current_user_id: str = Depends(get_current_user)):
-    # Fetch transactions for the current user only, sorted by update time (descending)
-    transactions = list(collection.find(
-        {"user_id": current_user_id}, 
-        {"_id": 0}
-    ).sort("updated_at", -1))
-    
-    print(f"Fetched {len(transactions)} transactions for user {current_user_id}")  # Debug line
-    return {"transactions": transactions}
+async def get_transactions(
+    type: Optional[Literal["income", "expense"]] = None,
+    category: Optional[str] = None,
+    start_date: Optional[date] = Query(None, description="Earliest transaction_date (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Latest transaction_date (inclusive)"),
+    min_amount: Optional[float] = Query(None, ge=0),
+    max_amount: Optional[float] = Query(None, ge=0),
+    sort_by: Literal["updated_at", "date", "amount", "category"] = "updated_at",
+    sort_order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    format: Optional[Literal["json", "columnar"]] = Query(None, description="columnar returns one array per field"),
+    accept: Optional[str] = Header(None),
+    request: Request = None,
+    response: Response = None,
+    current_user_id: str = Depends(get_current_user)
+):
+    try:
+        projection = build_projection(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    sort_field = SORT_FIELDS[sort_by]
+    direction = -1 if sort_order == "desc" else 1
+
+    query = build_transaction_filter(
+        current_user_id, type, category, start_date, end_date, min_amount, max_amount
+    )
+    if after:
+        position = decode_cursor(after, sort_field)
+        if not position:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = {"$and": [query, keyset_filter(sort_field, *position, direction)]}
+
+    # The cursor is built from these, so they are always fetched
+    if projection is not None:
+        projection[sort_field] = 1
+
+    # Unchanged since the client's copy: answer without querying transactions
+    etag_headers, not_modified = await versioning.check_etag(request, current_user_id)
+    if not_modified:
+        return not_modified
+
+    # Fetch one page for the current user; _id breaks ties between equal sort values
+    documents = await collection.find(query, projection).sort(
+        [(sort_field, direction), ("_id", direction)]
+    ).limit(limit + 1).to_list(length=limit + 1)
+
+    has_more = len(documents) > limit
+    documents = documents[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = documents[-1]
+        next_cursor = encode_cursor(sort_field, last[sort_field], last["_id"])
+
+    requested = [f.strip() for f in fields.split(",")] if projection is not None else None
+
+    if wants_columnar(accept, format):
+        for doc in documents:
+            doc["id"] = str(doc.pop("_id"))
+        columns = ["id"] + (requested if requested is not None else list(TRANSACTION_FIELDS))
+        return columnar_response(documents, columns, next_cursor, headers=etag_headers)
+
+    transactions = []
+    for doc in documents:
+        doc["id"] = str(doc.pop("_id"))
+        if requested is not None and sort_field not in requested:
+            doc.pop(sort_field, None)
+        transactions.append(doc)
+
+    response.headers.update(etag_headers)
+    return {"transactions": transactions, "next_cursor": next_cursor}
+
+@app.get("/transactions/changes")
+async def get_transaction_changes(
+    since: Optional[str] = Query(None, description="Watermark returned as next by the previous sync; omit for a full sync"),
+    limit: int = Query(changes.MAX_CHANGES, ge=1, le=changes.MAX_CHANGES),
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    Transactions created, updated or deleted since a watermark.
+
+    Keep calling with the returned `next` while `has_more` is true.
+    """
+    try:
+        return await changes.changes_since(current_user_id, since, limit)
+    except changes.WatermarkExpired:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Watermark is older than retained deletes; sync again without since"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/transactions/search")
+async def search_transactions(
+    q: str = Query(..., min_length=1, max_length=100),
+    mode: Literal["text", "prefix"] = "text",
+    field: Literal["description", "category"] = Query("description", description="Field to complete in prefix mode"),
+    limit: int = Query(20, ge=1, le=MAX_SEARCH_LIMIT),
+    page: int = Query(1, ge=1, le=50),
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    Ranked full-text search, or prefix suggestions for autocomplete
+    """
+    if mode == "prefix":
+        cursor = await collection.aggregate(
+            suggestion_pipeline(current_user_id, field, q, min(limit, MAX_SUGGESTIONS))
+        )
+        suggestions = [{"value": doc["_id"], "count": doc["count"]} async for doc in cursor]
+        return {"suggestions": suggestions}
+
+    # Best matches first; offset paging is fine for the shallow pages search needs
+    documents = await collection.find(
+        text_search_query(current_user_id, q),
+        {"score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"}), ("_id", -1)]).skip((page - 1) * limit).limit(limit + 1).to_list(length=limit + 1)
+
+    has_more = len(documents) > limit
+    transactions = []
+    for doc in documents[:limit]:
+        doc["id"] = str(doc.pop("_id"))
+        transactions.append(doc)
+
+    return {"transactions": transactions, "page": page, "has_more": has_more}
+
+@app.get("/transactions/summary")
+async def get_transactions_summary(
+    type: Optional[Literal["income", "expense"]] = None,
+    category: Optional[str] = None,
+    start_date: Optional[date] = Query(None, description="Earliest transaction_date (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Latest transaction_date (inclusive)"),
+    request: Request = None,
+    response: Response = None,
+    current_user_id: str = Depends(get_current_user)
+):
+    etag_headers, not_modified = await versioning.check_etag(request, current_user_id)
+    if not_modified:
+        return not_modified
+    response.headers.update(etag_headers)
+
+    # Without a date range the answer comes straight from the monthly rollups
+    if not start_date and not end_date:
+        return await rollups.rollup_summary(current_user_id, type, category)
+
+    # Totals, monthly series and category breakdown in a single aggregation
+    match = build_transaction_filter(current_user_id, type, category, start_date, end_date)
+    cursor = await collection.aggregate(build_summary_pipeline(match))
+    facets = await cursor.to_list(length=1)
+    return format_summary(facets[0] if facets else {})
+
+@app.get("/transactions/export")
+async def export_transactions(
+    format: Literal["csv", "ndjson"] = "ndjson",
+    start_date: Optional[date] = Query(None, description="Earliest transaction_date (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Latest transaction_date (inclusive)"),
+    gzip: bool = Query(False, description="Compress the response with gzip"),
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    Stream every matching transaction as CSV or NDJSON without buffering the result set
+    """
+    query = build_transaction_filter(current_user_id, start_date=start_date, end_date=end_date)
+    body = iter_export(query, format)
+    headers = {"Content-Disposition": f'attachment; filename="transactions.{format}"'}
+    if gzip:
+        body = gzip_stream(body)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(body, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
 
 @app.get("/transactions/{transaction_id}")
-def get_transaction(transaction_id: str, current_user_id: str = Depends(get_current_user)):
+async def get_transaction(transaction_id: str, current_user_id: str = Depends(get_current_user)):
     try:
-        transaction = collection.find_one({
+        transaction = await collection.find_one({
             "_id": ObjectId(transaction_id),
             "user_id": current_user_id
         }, {"_id": 0})
@@ -301,53 +728,233 @@ def get_transaction(transaction_id: str, current_user_id: str = Depends(get_curr
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid transaction ID")
 
+def parse_transaction_id(transaction_id: str) -> ObjectId:
+    try:
+        return ObjectId(transaction_id)
+    except InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid transaction ID")
+
 @app.put("/transactions/{transaction_id}")
-def update_transaction(
+async def update_transaction(
     transaction_id: str, 
     transaction_update: TransactionUpdate,
     current_user_id: str = Depends(get_current_user)
 ):
-    try:
-        update_data = {k: v for k, v in transaction_update.dict(exclude_unset=True).items() if v is not None}
-        
-        if not update_data:
-            raise HTTPException(status_code=400, detail="No data provided for update")
-        
-        # Convert date to datetime if provided
-        if 'transaction_date' in update_data:
-            update_data['transaction_date'] = datetime.combine(
-                update_data['transaction_date'], datetime.min.time()
-            )
-        
-        update_data['updated_at'] = datetime.utcnow()
-        
-        result = collection.update_one(
-            {"_id": ObjectId(transaction_id), "user_id": current_user_id},
-            {"$set": update_data}
-        )
-        
-        if result.matched_count == 0:
-            raise HTTPException(status_code=404, detail="Transaction not found")
-        
-        return {"message": "Transaction updated successfully"}
-    except Exception as e:
-        if "not found" in str(e):
-            raise e
-        raise HTTPException(status_code=400, detail="Invalid transaction ID")
+    object_id = parse_transaction_id(transaction_id)
+    update_data = build_transaction_update(transaction_update)
+
+    # The previous values are needed to move the rollup contribution
+    previous = await collection.find_one_and_update(
+        {"_id": object_id, "user_id": current_user_id},
+        {"$set": update_data},
+        return_document=ReturnDocument.BEFORE
+    )
+
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+
+    # The write has happened; failures from here on must surface as errors, not a 400
+    updated = {**previous, **update_data}
+    rollup = await rollups.apply_change(previous, updated)
+    await versioning.bump_version(current_user_id)
+
+    response = {"message": "Transaction updated successfully"}
+    alert = await budgets.check_overspend(updated, rollup)
+    if alert:
+        response["budget_alert"] = alert
+    return response
 
 @app.delete("/transactions/{transaction_id}")
-def delete_transaction(transaction_id: str, current_user_id: str = Depends(get_current_user)):
+async def delete_transaction(transaction_id: str, current_user_id: str = Depends(get_current_user)):
+    deleted = await collection.find_one_and_delete({
+        "_id": parse_transaction_id(transaction_id),
+        "user_id": current_user_id
+    })
+
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Transaction not found")
+
+    await rollups.apply_transaction(deleted, -1)
+    await changes.record_deletes(current_user_id, [deleted["_id"]])
+    await versioning.bump_version(current_user_id)
+
+    return {"message": "Transaction deleted successfully"}
+
+
+# ===== BUDGET ENDPOINTS =====
+
+def budget_response(doc: dict) -> dict:
+    return {
+        "id": str(doc["_id"]),
+        "category": doc["category"],
+        "monthly_limit": doc["monthly_limit"],
+        "alert_threshold": doc["alert_threshold"],
+    }
+
+@app.post("/budgets/")
+async def create_budget(budget: BudgetCreate, current_user_id: str = Depends(get_current_user)):
+    budget_dict = budget.dict()
+    budget_dict["user_id"] = current_user_id
+    budget_dict["created_at"] = datetime.utcnow()
+    budget_dict["updated_at"] = datetime.utcnow()
+
     try:
-        result = collection.delete_one({
-            "_id": ObjectId(transaction_id),
-            "user_id": current_user_id
-        })
-        
-        if result.deleted_count == 0:
-            raise HTTPException(status_code=404, detail="Transaction not found")
-        
-        return {"message": "Transaction deleted successfully"}
-    except Exception as e:
-        if "not found" in str(e):
-            raise e
-        raise HTTPException(status_code=400, detail="Invalid transaction ID")
\ No newline at end of file
+        await budgets_collection.insert_one(budget_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="A budget for this category already exists")
+
+    budgets.budget_cache.invalidate(current_user_id)
+    return {"message": "Budget created", "budget": budget_response(budget_dict)}
+
+@app.get("/budgets/")
+async def get_budgets(current_user_id: str = Depends(get_current_user)):
+    user_budgets = await budgets.budgets_for_user(current_user_id)
+    return {"budgets": [budget_response(doc) for _, doc in sorted(user_budgets.items())]}
+
+@app.get("/budgets/status")
+async def get_budget_status(
+    month: Optional[str] = Query(None, pattern=r"^\d{4}-(0[1-9]|1[0-2])$", description="YYYY-MM; defaults to the current month"),
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    Spend against every budget for a month, answered from the monthly rollups
+    """
+    month = month or budgets.current_month()
+    return {"month": month, "budgets": await budgets.budget_status(current_user_id, month)}
+
+@app.put("/budgets/{budget_id}")
+async def update_budget(budget_id: str, budget_update: BudgetUpdate, current_user_id: str = Depends(get_current_user)):
+    update_data = {k: v for k, v in budget_update.dict(exclude_unset=True).items() if v is not None}
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No data provided for update")
+    update_data["updated_at"] = datetime.utcnow()
+
+    try:
+        object_id = ObjectId(budget_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid budget ID")
+
+    updated = await budgets_collection.find_one_and_update(
+        {"_id": object_id, "user_id": current_user_id},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Budget not found")
+
+    budgets.budget_cache.invalidate(current_user_id)
+    return {"message": "Budget updated successfully", "budget": budget_response(updated)}
+
+@app.delete("/budgets/{budget_id}")
+async def delete_budget(budget_id: str, current_user_id: str = Depends(get_current_user)):
+    try:
+        object_id = ObjectId(budget_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid budget ID")
+
+    result = await budgets_collection.delete_one({"_id": object_id, "user_id": current_user_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Budget not found")
+
+    budgets.budget_cache.invalidate(current_user_id)
+    return {"message": "Budget deleted successfully"}
+
+
+# ===== RECURRING TRANSACTION ENDPOINTS =====
+
+def recurring_response(doc: dict) -> dict:
+    rule = {k: v for k, v in doc.items() if k not in ("_id", "user_id")}
+    rule["id"] = str(doc["_id"])
+    return rule
+
+def parse_rule_id(rule_id: str) -> ObjectId:
+    try:
+        return ObjectId(rule_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid rule ID")
+
+@app.post("/recurring/")
+async def create_recurring_rule(rule: RecurringRuleCreate, current_user_id: str = Depends(get_current_user)):
+    """
+    Create a rule; occurrences from start_date up to today are backfilled on the next scheduler run
+    """
+    rule_dict = rule.dict()
+    rule_dict["user_id"] = current_user_id
+    rule_dict["start_date"] = datetime.combine(rule.start_date, datetime.min.time())
+    if rule.end_date is not None:
+        rule_dict["end_date"] = datetime.combine(rule.end_date, datetime.min.time())
+    rule_dict["active"] = True
+    rule_dict.update(recurring.schedule_state(rule_dict, 0))
+    rule_dict["created_at"] = datetime.utcnow()
+    rule_dict["updated_at"] = datetime.utcnow()
+
+    await recurring_collection.insert_one(rule_dict)
+    return {"message": "Recurring rule created", "rule": recurring_response(rule_dict)}
+
+@app.get("/recurring/")
+async def get_recurring_rules(current_user_id: str = Depends(get_current_user)):
+    rules = await recurring_collection.find({"user_id": current_user_id}).sort("next_run_at", 1).to_list(length=None)
+    return {"rules": [recurring_response(rule) for rule in rules]}
+
+@app.get("/recurring/forecast")
+async def forecast_recurring(
+    months: int = Query(3, ge=1, le=recurring.MAX_FORECAST_MONTHS),
+    current_user_id: str = Depends(get_current_user)
+):
+    """
+    Projected transactions from the user's active rules for the next N months; nothing is written
+    """
+    rules = await recurring_collection.find({"user_id": current_user_id, "active": True}).to_list(length=None)
+    today = datetime.combine(date.today(), datetime.min.time())
+    return recurring.forecast(rules, today, recurring.add_months(today, months))
+
+@app.put("/recurring/{rule_id}")
+async def update_recurring_rule(
+    rule_id: str,
+    rule_update: RecurringRuleUpdate,
+    current_user_id: str = Depends(get_current_user)
+):
+    update_data = {k: v for k, v in rule_update.dict(exclude_unset=True).items() if v is not None}
+    if not update_data:
+        raise HTTPException(status_code=400, detail="No data provided for update")
+
+    query = {"_id": parse_rule_id(rule_id), "user_id": current_user_id}
+    rule = await recurring_collection.find_one(query)
+    if rule is None:
+        raise HTTPException(status_code=404, detail="Recurring rule not found")
+
+    if "end_date" in update_data:
+        update_data["end_date"] = datetime.combine(update_data["end_date"], datetime.min.time())
+    merged = {**rule, **update_data}
+    if update_data.get("active") or "end_date" in update_data:
+        # Resuming skips occurrences missed while paused instead of backfilling them
+        n = rule["run_count"]
+        if update_data.get("active") and not rule["active"]:
+            today = datetime.combine(date.today(), datetime.min.time())
+            n = recurring.first_occurrence_from(merged, today, n)
+        state = recurring.schedule_state(merged, n)
+        state.setdefault("active", merged["active"])
+        update_data.update(state)
+    update_data["updated_at"] = datetime.utcnow()
+
+    # Guard on run_count so a concurrent scheduler run is not overwritten
+    updated = await recurring_collection.find_one_and_update(
+        {**query, "run_count": rule["run_count"]},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        raise HTTPException(status_code=409, detail="Rule was just run by the scheduler; retry the update")
+
+    return {"message": "Recurring rule updated successfully", "rule": recurring_response(updated)}
+
+@app.delete("/recurring/{rule_id}")
+async def delete_recurring_rule(rule_id: str, current_user_id: str = Depends(get_current_user)):
+    """
+    Delete a rule; transactions it already created are kept
+    """
+    result = await recurring_collection.delete_one({"_id": parse_rule_id(rule_id), "user_id": current_user_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Recurring rule not found")
+
+    return {"message": "Recurring rule deleted successfully"}
@@ -0,0 +1,263 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Covers per-route request latency (RequestTimingMiddleware), MongoDB command
+timing and document counts (MongoCommandMetrics, a pymongo CommandListener),
+and bcrypt/JWT timing recorded by app.auth. Requests and queries slower than
+SLOW_REQUEST_MS / SLOW_QUERY_MS are logged.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Tuple
+from pymongo import monitoring
+from app.config import settings
+
+logger = logging.getLogger("app.metrics")
+
+SLOW_REQUEST_MS = settings.slow_request_ms
+SLOW_QUERY_MS = settings.slow_query_ms
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[n] for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # bucket counts, then sum and count
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram: Histogram, labels: dict):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Gauge:
+    """Gauge whose samples are read from a callback at render time"""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str], collect: Callable[[], Dict[tuple, float]]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route", "status"),
+))
+mongodb_command_duration = registry.register(Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command"),
+))
+mongodb_command_documents = registry.register(Counter(
+    "mongodb_command_documents_total", "Documents returned or affected by MongoDB commands",
+    ("collection", "command"),
+))
+mongodb_command_failures = registry.register(Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands",
+    ("collection", "command"),
+))
+password_hash_duration = registry.register(Histogram(
+    "password_hash_duration_seconds", "bcrypt hashing and verification time",
+    ("operation",), buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+))
+jwt_verify_duration = registry.register(Histogram(
+    "jwt_verify_duration_seconds", "JWT verification time",
+    ("cached",), buckets=(0.000001, 0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005),
+))
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware recording per-route latency and logging slow requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Label by route template, not raw path, to keep cardinality bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(
+                elapsed, method=scope["method"], route=route_path, status=str(status_code)
+            )
+            if elapsed * 1000 >= SLOW_REQUEST_MS:
+                logger.warning(
+                    "Slow request: %s %s -> %s in %.1fms",
+                    scope["method"], scope["path"], status_code, elapsed * 1000,
+                )
+
+
+# Commands whose first argument is not a collection name
+_NON_COLLECTION_COMMANDS = {"hello", "ismaster", "isMaster", "ping", "endSessions", "buildInfo", "getMore"}
+
+
+def _document_count(reply: dict) -> int:
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+    if "n" in reply:
+        return reply["n"]
+    return 0
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Record per-collection, per-command MongoDB timing and document counts"""
+
+    def __init__(self):
+        # Collection of each in-flight command; finish events don't carry the command
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        command = event.command
+        if event.command_name == "getMore":
+            # getMore names the collection in its "collection" field
+            collection = command.get("collection", "")
+        elif event.command_name in _NON_COLLECTION_COMMANDS:
+            collection = ""
+        else:
+            # Most commands name their collection as the command's value
+            value = command.get(event.command_name)
+            collection = value if isinstance(value, str) else ""
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._pending.pop((event.connection_id, event.request_id), "")
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        seconds = event.duration_micros / 1e6
+        mongodb_command_duration.observe(seconds, collection=collection, command=event.command_name)
+        mongodb_command_documents.inc(
+            _document_count(event.reply), collection=collection, command=event.command_name
+        )
+        if seconds * 1000 >= SLOW_QUERY_MS:
+            logger.warning(
+                "Slow query: %s on %s took %.1fms", event.command_name, collection or "-", seconds * 1000
+            )
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongodb_command_duration.observe(
+            event.duration_micros / 1e6, collection=collection, command=event.command_name
+        )
+        mongodb_command_failures.inc(collection=collection, command=event.command_name)
+
+
+command_listener = MongoCommandMetrics()
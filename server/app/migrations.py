@@ -0,0 +1,199 @@
+"""Versioned, idempotent schema migrations.
+
+Run once per deploy, before starting workers:
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations --status   # list applied and pending versions
+
+Applied versions are recorded in the schema_migrations collection. Every
+step is safe to re-run (create_index is a no-op for an existing index, and
+the rollup backfill writes each key with an idempotent $set upsert), so two
+deploys racing each other cannot leave the schema half-applied.
+
+Data backfills (DATA_MIGRATIONS) are not atomic with respect to live
+writes. Run them with transaction writes stopped, that is, before any worker
+old or new is serving, and check the result with `python -m app.rollups
+verify`.
+
+With RUN_MIGRATIONS_ON_STARTUP, each worker calls migrate_on_startup in its
+lifespan instead. That path only applies index steps and leaves data
+backfills pending for the command above, since other workers may already be
+serving writes. Workers take turns through the "schema_migrations" lease, so
+the steps run once rather than in every worker at the same time.
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import List
+from pymongo.errors import DuplicateKeyError
+from app import database
+from app.database import (
+    collection, users_collection, rollups_collection, migrations_collection, tombstones_collection,
+    budgets_collection, recurring_collection, leases_collection,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def create_base_indexes():
+    # Create unique index on email for users
+    await users_collection.create_index("email", unique=True)
+
+    # Create index on user_id for transactions (for user-specific queries)
+    await collection.create_index("user_id")
+
+    # Create compound index for user transactions by date
+    await collection.create_index([("user_id", 1), ("transaction_date", -1)])
+
+
+async def create_pagination_index():
+    # Compound index backing keyset pagination on the transaction list
+    await collection.create_index([("user_id", 1), ("updated_at", -1), ("_id", -1)])
+
+
+async def create_filter_indexes():
+    # Compound indexes backing the list filters and sort keys
+    await collection.create_index([("user_id", 1), ("transaction_date", -1), ("_id", -1)])
+    await collection.create_index([("user_id", 1), ("amount", -1), ("_id", -1)])
+    # Every list sort ends in _id, so the indexes must too or each page sorts in memory
+    await collection.create_index([("user_id", 1), ("category", 1), ("_id", 1)])
+    await collection.create_index([("user_id", 1), ("category", 1), ("transaction_date", -1), ("_id", -1)])
+    await collection.create_index([("user_id", 1), ("type", 1), ("transaction_date", -1), ("_id", -1)])
+
+
+async def create_rollup_index():
+    # One rollup document per user, month and category
+    await rollups_collection.create_index([("user_id", 1), ("month", 1), ("category", 1)], unique=True)
+
+
+async def create_search_indexes():
+    # Text index scoped by user_id: $text queries must match user_id exactly
+    await collection.create_index(
+        [("user_id", 1), ("description", "text"), ("category", "text")],
+        name="user_text_search",
+        weights={"description": 2, "category": 1},
+    )
+    # Anchored prefix lookups for description autocomplete
+    await collection.create_index([("user_id", 1), ("description", 1)])
+
+
+async def create_tombstone_indexes():
+    from app.changes import TOMBSTONE_TTL_SECONDS
+    # Keyset reads of a user's deletes for GET /transactions/changes
+    await tombstones_collection.create_index([("user_id", 1), ("deleted_at", 1), ("_id", 1)])
+    # Expire tombstones; changing TOMBSTONE_TTL_SECONDS later needs a collMod
+    await tombstones_collection.create_index("deleted_at", expireAfterSeconds=TOMBSTONE_TTL_SECONDS)
+
+
+async def create_budget_index():
+    # One budget per user and category
+    await budgets_collection.create_index([("user_id", 1), ("category", 1)], unique=True)
+
+
+async def create_recurring_indexes():
+    # Due-rule lookups by the scheduler, and per-user listing
+    await recurring_collection.create_index([("active", 1), ("next_run_at", 1)])
+    await recurring_collection.create_index("user_id")
+    # One transaction per rule occurrence, however often the scheduler retries
+    await collection.create_index(
+        "recurring_key", unique=True, partialFilterExpression={"recurring_key": {"$exists": True}}
+    )
+
+
+async def backfill_rollups():
+    # Requires transaction writes to be stopped; see rebuild_rollups
+    from app.rollups import rebuild_rollups
+    await rebuild_rollups()
+
+
+# (version, description, step) in the order they must run; never renumber
+MIGRATIONS = [
+    (1, "base user and transaction indexes", create_base_indexes),
+    (2, "transaction list pagination index", create_pagination_index),
+    (3, "transaction list filter and sort indexes", create_filter_indexes),
+    (4, "monthly rollups unique index", create_rollup_index),
+    (5, "backfill monthly rollups", backfill_rollups),
+    (6, "transaction search indexes", create_search_indexes),
+    (7, "delta sync tombstone indexes", create_tombstone_indexes),
+    (8, "budgets unique index", create_budget_index),
+    (9, "recurring rule and occurrence indexes", create_recurring_indexes),
+]
+
+# Versions that rewrite data rather than build indexes; never run from the app lifespan
+DATA_MIGRATIONS = {5}
+
+MIGRATION_LEASE_ID = "schema_migrations"
+# Long enough for index builds; a worker that dies holding it only delays the next one
+MIGRATION_LEASE_SECONDS = 600
+
+
+async def applied_versions() -> List[int]:
+    return sorted([doc["_id"] async for doc in migrations_collection.find({}, {"_id": 1})])
+
+
+async def migrate(include_data: bool = True) -> List[int]:
+    """Apply every pending migration in order; returns the versions applied.
+
+    With include_data=False, data backfills are skipped and stay pending.
+    """
+    done = set(await applied_versions())
+    applied = []
+    for version, description, step in MIGRATIONS:
+        if version in done:
+            continue
+        if version in DATA_MIGRATIONS and not include_data:
+            logger.warning(
+                "Migration %s (%s) is pending; run python -m app.migrations with writes stopped",
+                version, description,
+            )
+            continue
+        logger.info("Applying migration %s: %s", version, description)
+        await step()
+        try:
+            await migrations_collection.insert_one({
+                "_id": version,
+                "description": description,
+                "applied_at": datetime.utcnow(),
+            })
+        except DuplicateKeyError:
+            # Another deploy recorded it first; the step itself is idempotent
+            pass
+        applied.append(version)
+    return applied
+
+
+async def migrate_on_startup(owner: str) -> List[int]:
+    """Index-only migrate for the app lifespan, run by one worker at a time"""
+    from app.recurring import acquire_lease
+    while not await acquire_lease(owner, MIGRATION_LEASE_SECONDS, MIGRATION_LEASE_ID):
+        await asyncio.sleep(1)
+    try:
+        return await migrate(include_data=False)
+    finally:
+        await leases_collection.delete_one({"_id": MIGRATION_LEASE_ID, "owner": owner})
+
+
+async def _main(status: bool) -> int:
+    await database.connect()
+    try:
+        if status:
+            done = set(await applied_versions())
+            for version, description, _ in MIGRATIONS:
+                kind = "  (data)" if version in DATA_MIGRATIONS else ""
+                print(f"{version:>3} {'applied' if version in done else 'pending'}  {description}{kind}")
+            return 0
+
+        applied = await migrate()
+        print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
+        return 0
+    finally:
+        await database.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="list migration versions without applying")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.status)))
@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class BudgetCreate(BaseModel):
+    category: str = Field(..., example="food")
+    monthly_limit: float = Field(..., gt=0, example=400.00)
+    alert_threshold: float = Field(0.8, gt=0, le=1, example=0.8)
+
+class BudgetUpdate(BaseModel):
+    monthly_limit: Optional[float] = Field(None, gt=0, example=450.00)
+    alert_threshold: Optional[float] = Field(None, gt=0, le=1, example=0.9)
@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, Optional
+from datetime import date
+
+class RecurringRuleCreate(BaseModel):
+    description: str = Field(..., example="Rent")
+    amount: float = Field(..., gt=0, example=1200.00)
+    type: Literal["income", "expense"] = Field(..., example="expense")
+    category: str = Field(..., example="utilities")
+    frequency: Literal["daily", "weekly", "monthly", "yearly"] = Field(..., example="monthly")
+    interval: int = Field(1, ge=1, le=366, example=1)
+    start_date: date = Field(..., example="2025-05-01")
+    end_date: Optional[date] = Field(None, example="2026-04-30")
+
+    @model_validator(mode="after")
+    def check_dates(self):
+        if self.end_date is not None and self.end_date < self.start_date:
+            raise ValueError("end_date must not be before start_date")
+        return self
+
+class RecurringRuleUpdate(BaseModel):
+    description: Optional[str] = Field(None, example="Rent (new lease)")
+    amount: Optional[float] = Field(None, gt=0, example=1250.00)
+    category: Optional[str] = Field(None, example="utilities")
+    end_date: Optional[date] = Field(None, example="2027-04-30")
+    active: Optional[bool] = Field(None, example=False)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import List, Literal, Optional
 from datetime import date
 
 class Transaction(BaseModel):
@@ -22,4 +22,24 @@ class TransactionUpdate(BaseModel):
     amount: Optional[float] = Field(None, gt=0, example=30.00)
     type: Optional[Literal["income", "expense"]] = Field(None, example="income")
     category: Optional[str] = Field(None, example="Entertainment")
-    transaction_date: Optional[date] = Field(None, example="2025-04-27")
\ No newline at end of file
+    transaction_date: Optional[date] = Field(None, example="2025-04-27")
+
+class TransactionFilter(BaseModel):
+    type: Optional[Literal["income", "expense"]] = Field(None, example="expense")
+    category: Optional[str] = Field(None, example="Food")
+    start_date: Optional[date] = Field(None, example="2025-04-01")
+    end_date: Optional[date] = Field(None, example="2025-04-30")
+    # An empty filter matches the whole history, so it must be asked for explicitly
+    all: bool = Field(False, example=False)
+
+    def has_criteria(self) -> bool:
+        return any(v is not None for v in (self.type, self.category, self.start_date, self.end_date))
+
+class TransactionBatchUpdate(BaseModel):
+    ids: Optional[List[str]] = Field(None, max_length=5000, example=["60f7b1b3b3f3f3f3f3f3f3f3"])
+    filter: Optional[TransactionFilter] = None
+    update: TransactionUpdate
+
+class TransactionBatchDelete(BaseModel):
+    ids: Optional[List[str]] = Field(None, max_length=5000, example=["60f7b1b3b3f3f3f3f3f3f3f3"])
+    filter: Optional[TransactionFilter] = None
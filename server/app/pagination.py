@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, List
+from bson import ObjectId
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Fields a client may ask for through the `fields` projection parameter
+TRANSACTION_FIELDS = (
+    "description",
+    "amount",
+    "type",
+    "category",
+    "transaction_date",
+    "created_at",
+    "updated_at",
+)
+
+
+# Public sort keys mapped to the document field they order by
+SORT_FIELDS = {
+    "updated_at": "updated_at",
+    "date": "transaction_date",
+    "amount": "amount",
+    "category": "category",
+}
+
+
+def encode_cursor(sort_field: str, value, doc_id: ObjectId) -> str:
+    """Encode a (sort value, _id) keyset position into an opaque cursor"""
+    is_datetime = isinstance(value, datetime)
+    raw = json.dumps({
+        "f": sort_field,
+        "v": value.isoformat() if is_datetime else value,
+        "d": is_datetime,
+        "i": str(doc_id),
+    })
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort_field: str) -> Optional[tuple]:
+    """Decode an opaque cursor back into (sort value, _id).
+
+    Returns None if the cursor is malformed or was issued for a different sort.
+    """
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if raw["f"] != sort_field:
+            return None
+        value = datetime.fromisoformat(raw["v"]) if raw["d"] else raw["v"]
+        return value, ObjectId(raw["i"])
+    except Exception:
+        return None
+
+
+def keyset_filter(sort_field: str, value, doc_id: ObjectId, direction: int) -> dict:
+    """Match documents strictly after the cursor position in (sort_field, _id) order"""
+    op = "$lt" if direction < 0 else "$gt"
+    return {
+        "$or": [
+            {sort_field: {op: value}},
+            {sort_field: value, "_id": {op: doc_id}},
+        ]
+    }
+
+
+def build_projection(fields: Optional[str]) -> Optional[dict]:
+    """Turn a comma-separated `fields` parameter into a MongoDB projection.
+
+    Returns None for "all fields". Unknown names raise ValueError. Fields the
+    cursor is built from are added by the caller.
+    """
+    if not fields:
+        return None
+
+    requested: List[str] = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in TRANSACTION_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    return {f: 1 for f in requested}
@@ -0,0 +1,226 @@
+"""Token-bucket rate limiting for auth and data routes.
+
+RateLimitMiddleware matches each HTTP request against ROUTE_LIMITS plus any
+overrides in RATE_LIMITS, a JSON object such as:
+
+    {"POST /auth/login": {"rate": 5, "per": 60, "burst": 5, "key": "ip"},
+     "* /transactions/*": {"rate": 50, "per": 1, "burst": 200, "key": "user"}}
+
+A path ending in "*" matches by prefix; the longest match wins and an exact
+path beats any prefix. `key` is "ip" for the client address, or "user" for
+the access token's subject. Limits run before routing, so the token claims
+are read through TokenManager's verification cache instead of the
+get_current_user dependency. Requests without a valid token fall back to
+the client address.
+
+Limited requests get 429 with Retry-After. Buckets live in a BucketStore.
+MemoryBucketStore keeps them per worker. Another backend, such as Redis,
+can be shared across workers by implementing `take`.
+"""
+import json
+from abc import ABC, abstractmethod
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from app.auth import TokenManager
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    rate: float       # tokens added per `per` seconds
+    per: float = 1.0
+    burst: int = 1    # bucket capacity
+    key: str = "user"
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.rate / self.per
+
+
+# Defaults per "METHOD PATH"; bcrypt-heavy auth routes are limited per client address
+ROUTE_LIMITS: Dict[str, RateLimit] = {
+    "POST /auth/login": RateLimit(rate=10, per=60, burst=10, key="ip"),
+    "POST /auth/register": RateLimit(rate=5, per=60, burst=5, key="ip"),
+    "POST /auth/refresh": RateLimit(rate=30, per=60, burst=30, key="ip"),
+    "POST /auth/change-password": RateLimit(rate=5, per=60, burst=5, key="user"),
+    "POST /transactions/bulk": RateLimit(rate=1, per=1, burst=5, key="user"),
+    "* /transactions/*": RateLimit(rate=20, per=1, burst=100, key="user"),
+    "* /budgets/*": RateLimit(rate=20, per=1, burst=100, key="user"),
+    "* /recurring/*": RateLimit(rate=20, per=1, burst=100, key="user"),
+}
+
+
+def parse_limits(spec: str) -> Dict[str, RateLimit]:
+    """RATE_LIMITS JSON into {"METHOD PATH": RateLimit}"""
+    if not spec:
+        return {}
+    return {route: RateLimit(**options) for route, options in json.loads(spec).items()}
+
+
+class BucketStore(ABC):
+    """Storage for token buckets; implement `take` for a shared backend"""
+
+    @abstractmethod
+    async def take(self, key: Tuple, limit: RateLimit) -> float:
+        """Spend one token from the bucket at key; returns 0 if allowed, else seconds until one refills"""
+
+
+class MemoryBucketStore(BucketStore):
+    """Per-worker buckets in an LRU-ordered dict.
+
+    Every update runs on the event loop without an await between the read and
+    the write, so no lock is needed. A bucket that has refilled completely is
+    equivalent to no bucket, so idle entries are dropped from the LRU end once
+    full, and the store never holds more than max_keys entries.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: "OrderedDict[Tuple, list]" = OrderedDict()
+        self.limited = 0
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take_now(self, key: Tuple, limit: RateLimit, now: float) -> float:
+        refill = limit.refill_per_second
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            tokens = limit.burst
+        else:
+            tokens = min(limit.burst, bucket[0] + (now - bucket[1]) * refill)
+
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0.0
+        else:
+            wait = (1 - tokens) / refill
+            self.limited += 1
+
+        self._buckets[key] = [tokens, now, now + (limit.burst - tokens) / refill]
+        self._buckets.move_to_end(key)
+        self._expire(now)
+        return wait
+
+    def _expire(self, now: float):
+        buckets = self._buckets
+        while buckets:
+            key, bucket = next(iter(buckets.items()))
+            if bucket[2] > now and len(buckets) <= self.max_keys:
+                break
+            del buckets[key]
+
+    async def take(self, key: Tuple, limit: RateLimit) -> float:
+        return self.take_now(key, limit, time.monotonic())
+
+
+def client_address(scope) -> str:
+    """The client address as seen by the outermost of TRUSTED_PROXY_HOPS proxies.
+
+    Each proxy appends the address it received the request from, so only the
+    rightmost TRUSTED_PROXY_HOPS entries of X-Forwarded-For were written by
+    proxies we run; anything to their left is client-supplied and is ignored.
+    """
+    client = scope.get("client")
+    peer = client[0] if client else "unknown"
+    hops = settings.trusted_proxy_hops
+    if hops <= 0:
+        return peer
+
+    forwarded = []
+    for name, value in scope["headers"]:
+        if name == b"x-forwarded-for":
+            forwarded.extend(part.strip() for part in value.decode("latin-1").split(","))
+    if len(forwarded) < hops:
+        # Reached us without passing through every trusted proxy
+        return peer
+    return forwarded[-hops]
+
+
+def bearer_subject(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return TokenManager.user_id_from_payload(TokenManager.verify_token(token))
+            return None
+    return None
+
+
+class RouteLimits:
+    """Resolve the RateLimit for a method and path"""
+
+    def __init__(self, limits: Dict[str, RateLimit]):
+        self._exact: Dict[Tuple[str, str], RateLimit] = {}
+        self._prefixes = []
+        for route, limit in limits.items():
+            method, _, path = route.partition(" ")
+            if path.endswith("*"):
+                self._prefixes.append((path[:-1], method, limit))
+            else:
+                self._exact[(method, path)] = limit
+        # Longest prefix first; within one prefix a specific method beats "*"
+        self._prefixes.sort(key=lambda p: (len(p[0]), p[1] != "*"), reverse=True)
+
+    def match(self, method: str, path: str) -> Optional[Tuple[str, RateLimit]]:
+        """(route name, limit), or None when the route is unlimited"""
+        for candidate in ((method, path), ("*", path)):
+            limit = self._exact.get(candidate)
+            if limit is not None:
+                return f"{candidate[0]} {path}", limit
+        for prefix, limit_method, limit in self._prefixes:
+            if (limit_method == "*" or limit_method == method) and path.startswith(prefix):
+                return f"{limit_method} {prefix}*", limit
+        return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 once a client's bucket for the route is empty"""
+
+    def __init__(self, app, limits: Dict[str, RateLimit], store: BucketStore):
+        self.app = app
+        self.routes = RouteLimits(limits)
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        matched = self.routes.match(scope["method"], scope["path"])
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+
+        route, limit = matched
+        subject = bearer_subject(scope) if limit.key == "user" else None
+        identity = f"user:{subject}" if subject else f"ip:{client_address(scope)}"
+
+        retry_after = await self.store.take((route, identity), limit)
+        if retry_after > 0:
+            await _too_many_requests(send, retry_after)
+            return
+        await self.app(scope, receive, send)
+
+
+async def _too_many_requests(send, retry_after: float):
+    body = b'{"detail":"Too many requests, please retry later"}'
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+RATE_LIMITS = {**ROUTE_LIMITS, **parse_limits(settings.rate_limits)}
+
+bucket_store = MemoryBucketStore(settings.rate_limit_max_keys)
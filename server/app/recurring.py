@@ -0,0 +1,264 @@
+"""Recurring transaction rules and the scheduler that materializes them.
+
+A rule repeats every `interval` days, weeks, months or years from its
+start_date. Monthly and yearly rules keep the start date's day of the month,
+clamped to the month's last day. Occurrence n of a rule is a pure function of
+the rule, so the stored state is just `run_count` (the next occurrence's
+index) and `next_run_at` (its date), which the due-rule query reads through
+the (active, next_run_at) index.
+
+Each worker runs a RecurringScheduler. Only the holder of the lease document
+in scheduler_leases materializes rules. Duplicates are still impossible if
+two workers overlap, for example when a lease expires mid-run:
+
+- every generated transaction carries a unique `recurring_key`
+  ("<rule_id>:<n>"), so re-inserting an occurrence is rejected by the index
+  and never reaches the rollups
+- a rule only advances if its run_count still holds the value the run read
+"""
+import asyncio
+import calendar
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
+from app import budgets, rollups, versioning
+from app.config import settings
+from app.database import collection, leases_collection, recurring_collection
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_INTERVAL_SECONDS = settings.recurring_interval_seconds
+LEASE_SECONDS = max(3 * SCHEDULER_INTERVAL_SECONDS, 60)
+LEASE_ID = "recurring_scheduler"
+
+# Rules read per scheduler batch, and transactions per insert_many
+RULE_BATCH_SIZE = 500
+INSERT_BATCH_SIZE = 1000
+# Missed occurrences backfilled per rule per batch; the rest follow in later batches
+MAX_CATCH_UP = 400
+MAX_BATCHES_PER_RUN = 100
+
+MAX_FORECAST_MONTHS = 24
+
+DUPLICATE_KEY = 11000
+
+
+def add_months(start: datetime, months: int) -> datetime:
+    """`start` moved by whole months, keeping its day where the month allows"""
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    day = min(start.day, calendar.monthrange(year, month)[1])
+    return start.replace(year=year, month=month, day=day)
+
+
+def occurrence(rule: dict, n: int) -> datetime:
+    """Date of the rule's n-th occurrence, counting from 0 at start_date"""
+    start, step = rule["start_date"], n * rule["interval"]
+    frequency = rule["frequency"]
+    if frequency == "daily":
+        return start + timedelta(days=step)
+    if frequency == "weekly":
+        return start + timedelta(weeks=step)
+    if frequency == "monthly":
+        return add_months(start, step)
+    return add_months(start, 12 * step)
+
+
+def first_occurrence_from(rule: dict, since: datetime, n: int = 0) -> int:
+    """Index of the first occurrence on or after `since`, searching from n"""
+    while occurrence(rule, n) < since:
+        n += 1
+    return n
+
+
+def schedule_state(rule: dict, n: int) -> dict:
+    """$set fields for a rule whose next occurrence is n"""
+    next_run_at = occurrence(rule, n)
+    state = {"run_count": n, "next_run_at": next_run_at}
+    if rule.get("end_date") is not None and next_run_at > rule["end_date"]:
+        state["active"] = False
+    return state
+
+
+def to_transaction(rule: dict, n: int, at: datetime, now: datetime) -> dict:
+    return {
+        "user_id": rule["user_id"],
+        "description": rule["description"],
+        "amount": rule["amount"],
+        "type": rule["type"],
+        "category": rule["category"],
+        "transaction_date": at,
+        "recurring_key": f"{rule['_id']}:{n}",
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def due_occurrences(rule: dict, until: datetime, limit: int) -> List[tuple]:
+    """(n, date) of the rule's occurrences from run_count up to `until` and end_date"""
+    end_date = rule.get("end_date")
+    occurrences = []
+    n = rule["run_count"]
+    while len(occurrences) < limit:
+        at = occurrence(rule, n)
+        if at > until or (end_date is not None and at > end_date):
+            break
+        occurrences.append((n, at))
+        n += 1
+    return occurrences
+
+
+async def _insert(documents: List[dict]) -> List[dict]:
+    """Insert unordered; returns the documents that were actually written"""
+    try:
+        await collection.insert_many(documents, ordered=False)
+        return documents
+    except BulkWriteError as e:
+        failed = set()
+        for error in e.details.get("writeErrors", []):
+            failed.add(error["index"])
+            if error.get("code") != DUPLICATE_KEY:
+                logger.error("Recurring transaction insert failed: %s", error.get("errmsg"))
+        return [doc for i, doc in enumerate(documents) if i not in failed]
+
+
+async def run_batch(now: datetime) -> int:
+    """Materialize one batch of due rules; returns the number of rules read"""
+    rules = await recurring_collection.find(
+        {"active": True, "next_run_at": {"$lte": now}}
+    ).sort("next_run_at", 1).limit(RULE_BATCH_SIZE).to_list(length=RULE_BATCH_SIZE)
+
+    documents, advances = [], []
+    for rule in rules:
+        occurrences = due_occurrences(rule, now, MAX_CATCH_UP)
+        documents.extend(to_transaction(rule, n, at, now) for n, at in occurrences)
+        next_n = occurrences[-1][0] + 1 if occurrences else rule["run_count"]
+        advances.append(UpdateOne(
+            {"_id": rule["_id"], "run_count": rule["run_count"]},
+            {"$set": {**schedule_state(rule, next_n), "updated_at": now}},
+        ))
+
+    inserted = []
+    for start in range(0, len(documents), INSERT_BATCH_SIZE):
+        batch = documents[start:start + INSERT_BATCH_SIZE]
+        # `now` is the due cutoff for the whole run; updated_at must reflect the write
+        stamped = datetime.utcnow()
+        for document in batch:
+            document["created_at"] = document["updated_at"] = stamped
+        inserted.extend(await _insert(batch))
+
+    # Transactions first, then the rules: a crash in between re-runs into the unique index
+    if inserted:
+        rollup_docs = await rollups.apply_transactions(inserted, return_rollups=True)
+        for user_id in {doc["user_id"] for doc in inserted}:
+            await versioning.bump_version(user_id)
+        # No request to answer, so overspend from scheduled expenses is logged
+        for alert in await budgets.budget_alerts(inserted, rollup_docs):
+            logger.warning("Recurring expenses put budget %s (%s) %s: spent %.2f of %.2f",
+                           alert["budget_id"], alert["month"], alert["status"],
+                           alert["spent"], alert["monthly_limit"])
+    if advances:
+        await recurring_collection.bulk_write(advances, ordered=False)
+
+    if inserted:
+        logger.info("Materialized %d recurring transactions from %d rules", len(inserted), len(rules))
+    return len(rules)
+
+
+async def run_due(now: Optional[datetime] = None):
+    """Materialize every due rule, one batch at a time"""
+    now = now or datetime.utcnow()
+    for _ in range(MAX_BATCHES_PER_RUN):
+        if await run_batch(now) < RULE_BATCH_SIZE:
+            return
+
+
+async def acquire_lease(owner: str, seconds: float, lease_id: str = LEASE_ID) -> bool:
+    """Take or renew a lease (the scheduler's by default); False while another live owner holds it"""
+    now = datetime.utcnow()
+    try:
+        await leases_collection.find_one_and_update(
+            {"_id": lease_id, "$or": [{"owner": owner}, {"expires_at": {"$lte": now}}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return True
+    except DuplicateKeyError:
+        # The lease exists and is held by someone else, so the upsert collided
+        return False
+
+
+class RecurringScheduler:
+    """Wakes every SCHEDULER_INTERVAL_SECONDS and runs due rules while holding the lease"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                if await acquire_lease(self.owner, LEASE_SECONDS):
+                    await run_due()
+            except PyMongoError as e:
+                logger.warning("Recurring scheduler run failed: %s", e)
+            except Exception:
+                # A malformed rule must not kill the task and stop this worker for good
+                logger.exception("Recurring scheduler run failed")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+scheduler = RecurringScheduler(SCHEDULER_INTERVAL_SECONDS)
+
+
+def forecast(rules: List[dict], since: datetime, until: datetime) -> dict:
+    """Project the rules' occurrences from `since` up to `until` without writing anything.
+
+    Overdue occurrences the scheduler has not materialized yet are left out;
+    they belong to the past, not to the projection.
+    """
+    occurrences = []
+    monthly = {}
+    for rule in rules:
+        if not rule.get("active"):
+            continue
+        upcoming = {**rule, "run_count": first_occurrence_from(rule, since, rule["run_count"])}
+        for _, at in due_occurrences(upcoming, until, MAX_FORECAST_MONTHS * 31):
+            occurrences.append({
+                "rule_id": str(rule["_id"]),
+                "transaction_date": at,
+                "description": rule["description"],
+                "amount": rule["amount"],
+                "type": rule["type"],
+                "category": rule["category"],
+            })
+            key = rollups.month_key(at)
+            month = monthly.setdefault(key, {"month": key, "income": 0, "expenses": 0})
+            month["income" if rule["type"] == "income" else "expenses"] += rule["amount"]
+
+    occurrences.sort(key=lambda o: o["transaction_date"])
+    return {
+        "until": until,
+        "occurrences": occurrences,
+        "monthly": [monthly[m] for m in sorted(monthly)],
+    }
@@ -0,0 +1,249 @@
+"""Per-user monthly rollups of transaction totals.
+
+One document per (user_id, month, category) holds income/expense sums and
+counts. Transaction writes keep it current with $inc deltas so dashboard
+summaries read O(months) documents instead of the whole history.
+
+Rebuild or verify from the raw transactions collection with:
+
+    python -m app.rollups rebuild [--user USER_ID]
+    python -m app.rollups verify [--user USER_ID]
+"""
+import argparse
+import asyncio
+from typing import Optional, List
+from pymongo import ReturnDocument, UpdateOne
+from app import database, versioning
+from app.database import collection, rollups_collection
+
+# Floating point $inc drift tolerated by verify
+TOLERANCE = 0.005
+
+
+def month_key(transaction_date) -> str:
+    """Rollup month for a transaction_date datetime"""
+    return transaction_date.strftime("%Y-%m")
+
+
+def rollup_key(transaction: dict) -> dict:
+    return {
+        "user_id": transaction["user_id"],
+        "month": month_key(transaction["transaction_date"]),
+        "category": transaction["category"],
+    }
+
+
+def rollup_increment(transaction: dict, sign: int) -> dict:
+    """$inc document adding (sign=1) or removing (sign=-1) one transaction"""
+    if transaction["type"] == "income":
+        return {"income": sign * transaction["amount"], "income_count": sign}
+    return {"expenses": sign * transaction["amount"], "expense_count": sign}
+
+
+async def apply_transaction(transaction: dict, sign: int = 1) -> dict:
+    """Add or remove a single transaction's contribution; returns the updated rollup"""
+    return await rollups_collection.find_one_and_update(
+        rollup_key(transaction),
+        {"$inc": rollup_increment(transaction, sign)},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def apply_transactions(transactions: List[dict], sign: int = 1,
+                             return_rollups: bool = False) -> Optional[List[dict]]:
+    """Apply many transactions with one upsert per affected rollup.
+
+    With return_rollups, the affected rollups are read back after the write
+    (one extra query) and returned, as apply_transaction does for one row.
+    """
+    increments = {}
+    for transaction in transactions:
+        key = tuple(rollup_key(transaction).items())
+        total = increments.setdefault(key, {})
+        for field, value in rollup_increment(transaction, sign).items():
+            total[field] = total.get(field, 0) + value
+
+    if increments:
+        await rollups_collection.bulk_write([
+            UpdateOne(dict(key), {"$inc": inc}, upsert=True)
+            for key, inc in increments.items()
+        ], ordered=False)
+    if return_rollups:
+        if not increments:
+            return []
+        return await rollups_collection.find({"$or": [dict(key) for key in increments]}).to_list(length=None)
+    return None
+
+
+async def apply_change(old: dict, new: dict) -> dict:
+    """Move a transaction's contribution to its new values; returns the new values' rollup"""
+    if rollup_key(old) == rollup_key(new) and old["type"] == new["type"]:
+        # Same row in the same rollup: only the amount moves, the count stays
+        field = "income" if new["type"] == "income" else "expenses"
+        return await rollups_collection.find_one_and_update(
+            rollup_key(new),
+            {"$inc": {field: new["amount"] - old["amount"]}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    await apply_transaction(old, -1)
+    return await apply_transaction(new, 1)
+
+
+async def rollup_summary(user_id: str, type: Optional[str] = None, category: Optional[str] = None) -> dict:
+    """Build the /transactions/summary payload from a user's rollup documents"""
+    query = {"user_id": user_id}
+    if category:
+        query["category"] = category
+    documents = await rollups_collection.find(query, {"_id": 0}).to_list(length=None)
+
+    totals = {"income": 0, "expenses": 0, "count": 0, "income_count": 0}
+    monthly = {}
+    categories = {}
+    for doc in documents:
+        income = doc.get("income", 0) if type != "expense" else 0
+        expenses = doc.get("expenses", 0) if type != "income" else 0
+        income_count = doc.get("income_count", 0) if type != "expense" else 0
+        expense_count = doc.get("expense_count", 0) if type != "income" else 0
+        if not income_count and not expense_count:
+            # Emptied by deletes, or holds only the other type: the aggregation
+            # path never sees such a month, so neither may this one
+            continue
+
+        totals["income"] += income
+        totals["expenses"] += expenses
+        totals["income_count"] += income_count
+        totals["count"] += income_count + expense_count
+
+        month = monthly.setdefault(doc["month"], {"month": doc["month"], "income": 0, "expenses": 0})
+        month["income"] += income
+        month["expenses"] += expenses
+
+        if expense_count:
+            entry = categories.setdefault(doc["category"], {"category": doc["category"], "total": 0, "count": 0})
+            entry["total"] += expenses
+            entry["count"] += expense_count
+
+    return {
+        "totals": {**totals, "balance": totals["income"] - totals["expenses"]},
+        "monthly": [monthly[m] for m in sorted(monthly)],
+        "categories": sorted(categories.values(), key=lambda c: c["total"], reverse=True),
+    }
+
+
+async def compute_rollups(user_id: Optional[str] = None) -> List[dict]:
+    """Recompute rollup documents from the raw transactions collection"""
+    match = {"user_id": user_id} if user_id else {}
+    is_income = {"$eq": ["$type", "income"]}
+    cursor = await collection.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "month": {"$dateToString": {"format": "%Y-%m", "date": "$transaction_date"}},
+                "category": "$category",
+            },
+            "income": {"$sum": {"$cond": [is_income, "$amount", 0]}},
+            "expenses": {"$sum": {"$cond": [is_income, 0, "$amount"]}},
+            "income_count": {"$sum": {"$cond": [is_income, 1, 0]}},
+            "expense_count": {"$sum": {"$cond": [is_income, 0, 1]}},
+        }},
+    ])
+    results = []
+    async for doc in cursor:
+        results.append({**doc.pop("_id"), **doc})
+    return results
+
+
+def _key(doc: dict) -> tuple:
+    return doc["user_id"], doc["month"], doc["category"]
+
+
+def _matches(expected: dict, actual: dict) -> bool:
+    return (
+        abs(expected["income"] - actual.get("income", 0)) <= TOLERANCE
+        and abs(expected["expenses"] - actual.get("expenses", 0)) <= TOLERANCE
+        and expected["income_count"] == actual.get("income_count", 0)
+        and expected["expense_count"] == actual.get("expense_count", 0)
+    )
+
+
+async def verify_rollups(user_id: Optional[str] = None) -> List[tuple]:
+    """Return the keys whose stored rollup disagrees with the raw transactions"""
+    expected = {_key(doc): doc for doc in await compute_rollups(user_id)}
+    match = {"user_id": user_id} if user_id else {}
+    actual = {_key(doc): doc async for doc in rollups_collection.find(match, {"_id": 0})}
+
+    empty = {"income": 0, "expenses": 0, "income_count": 0, "expense_count": 0}
+    mismatched = []
+    for key in expected.keys() | actual.keys():
+        if not _matches(expected.get(key, empty), actual.get(key, {})):
+            mismatched.append(key)
+    return mismatched
+
+
+async def rebuild_rollups(user_id: Optional[str] = None) -> int:
+    """Overwrite stored rollups with values recomputed from raw transactions.
+
+    Keys that disagree are written with a $set upsert and keys with no
+    transactions left are deleted, so the collection is never empty
+    mid-rebuild and concurrent rebuilds converge on the same result. It is
+    not atomic with respect to live writes: a transaction written between the
+    aggregation and the $set for its key is overwritten. Run it with the write
+    path stopped, then `verify`.
+
+    Every user whose rollups changed gets a version bump, so summary ETags
+    issued against the old totals stop matching. Returns the number of
+    rollup documents recomputed.
+    """
+    rollups = await compute_rollups(user_id)
+    expected = {_key(doc): doc for doc in rollups}
+    match = {"user_id": user_id} if user_id else {}
+    stored = {_key(doc): doc async for doc in rollups_collection.find(match)}
+
+    changed = [doc for key, doc in expected.items() if key not in stored or not _matches(doc, stored[key])]
+    if changed:
+        await rollups_collection.bulk_write([
+            UpdateOne(
+                {"user_id": doc["user_id"], "month": doc["month"], "category": doc["category"]},
+                {"$set": {f: doc[f] for f in ("income", "expenses", "income_count", "expense_count")}},
+                upsert=True,
+            )
+            for doc in changed
+        ], ordered=False)
+
+    stale = [doc for key, doc in stored.items() if key not in expected]
+    if stale:
+        await rollups_collection.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}})
+
+    for changed_user in sorted({doc["user_id"] for doc in changed + stale}):
+        await versioning.bump_version(changed_user)
+    return len(rollups)
+
+
+async def _main(command: str, user_id: Optional[str]) -> int:
+    await database.connect()
+    try:
+        if command == "rebuild":
+            count = await rebuild_rollups(user_id)
+            print(f"Rebuilt {count} rollup documents")
+        mismatched = await verify_rollups(user_id)
+        if mismatched:
+            print(f"{len(mismatched)} rollup documents do not match raw transactions:")
+            for user, month, category in mismatched:
+                print(f"  user={user} month={month} category={category}")
+            return 1
+        print("Rollups match raw transactions")
+        return 0
+    finally:
+        await database.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the monthly_rollups collection")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--user", dest="user_id", help="Limit to a single user_id")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(_main(args.command, args.user_id)))
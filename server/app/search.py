@@ -0,0 +1,39 @@
+"""Search over a user's transaction descriptions and categories.
+
+Full-text mode uses the compound text index {user_id, description, category}
+so every query is confined to one user's entries and ranked by textScore.
+Prefix mode powers autocomplete with anchored regexes, which MongoDB serves
+as index range scans on (user_id, description) / (user_id, category).
+"""
+import re
+from typing import List
+
+MAX_SEARCH_LIMIT = 100
+MAX_SUGGESTIONS = 20
+# Rows examined per suggestion lookup, so short prefixes stay cheap
+SUGGESTION_SCAN_LIMIT = 5000
+
+
+def prefix_patterns(prefix: str) -> List[re.Pattern]:
+    """Anchored, index-friendly patterns for the prefix as typed, lowercased and capitalized.
+
+    A case-insensitive regex cannot use an index, so the common casings are
+    matched as separate anchored ranges instead.
+    """
+    variants = {prefix, prefix.lower(), prefix[:1].upper() + prefix[1:].lower()}
+    return [re.compile("^" + re.escape(v)) for v in sorted(variants)]
+
+
+def text_search_query(user_id: str, q: str) -> dict:
+    return {"user_id": user_id, "$text": {"$search": q}}
+
+
+def suggestion_pipeline(user_id: str, field: str, prefix: str, limit: int) -> List[dict]:
+    """Distinct values of `field` starting with prefix, most used first"""
+    return [
+        {"$match": {"user_id": user_id, field: {"$in": prefix_patterns(prefix)}}},
+        {"$limit": SUGGESTION_SCAN_LIMIT},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}, "last_used": {"$max": "$transaction_date"}}},
+        {"$sort": {"count": -1, "last_used": -1}},
+        {"$limit": limit},
+    ]
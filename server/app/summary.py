@@ -0,0 +1,64 @@
+from typing import List
+
+
+def build_summary_pipeline(match: dict) -> List[dict]:
+    """Aggregation pipeline computing totals, monthly series and expense categories in one pass"""
+    income_amount = {"$cond": [{"$eq": ["$type", "income"]}, "$amount", 0]}
+    expense_amount = {"$cond": [{"$eq": ["$type", "expense"]}, "$amount", 0]}
+
+    return [
+        {"$match": match},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "income": {"$sum": income_amount},
+                    "expenses": {"$sum": expense_amount},
+                    "count": {"$sum": 1},
+                    "income_count": {"$sum": {"$cond": [{"$eq": ["$type", "income"]}, 1, 0]}},
+                }},
+            ],
+            "monthly": [
+                {"$group": {
+                    "_id": {"$dateToString": {"format": "%Y-%m", "date": "$transaction_date"}},
+                    "income": {"$sum": income_amount},
+                    "expenses": {"$sum": expense_amount},
+                }},
+                {"$sort": {"_id": 1}},
+            ],
+            "categories": [
+                {"$match": {"type": "expense"}},
+                {"$group": {
+                    "_id": "$category",
+                    "total": {"$sum": "$amount"},
+                    "count": {"$sum": 1},
+                }},
+                {"$sort": {"total": -1}},
+            ],
+        }},
+    ]
+
+
+def format_summary(facets: dict) -> dict:
+    """Shape the $facet output into the compact summary payload"""
+    totals = facets["totals"][0] if facets.get("totals") else {}
+    income = totals.get("income", 0)
+    expenses = totals.get("expenses", 0)
+
+    return {
+        "totals": {
+            "income": income,
+            "expenses": expenses,
+            "balance": income - expenses,
+            "count": totals.get("count", 0),
+            "income_count": totals.get("income_count", 0),
+        },
+        "monthly": [
+            {"month": m["_id"], "income": m["income"], "expenses": m["expenses"]}
+            for m in facets.get("monthly", [])
+        ],
+        "categories": [
+            {"category": c["_id"], "total": c["total"], "count": c["count"]}
+            for c in facets.get("categories", [])
+        ],
+    }
@@ -0,0 +1,57 @@
+"""Per-user data versions backing ETag / conditional GET on transaction reads.
+
+Every write path that changes a user's transactions bumps a counter stored in
+the `data_versions` collection (one document per user, keyed by user_id). Read
+endpoints derive a strong ETag from that counter plus the request's query and
+Accept header, so a matching If-None-Match is answered with 304 after a single
+_id lookup, without touching the transactions collection.
+"""
+import hashlib
+from typing import Optional, Tuple
+from fastapi import Request, Response, status
+from app.database import versions_collection
+
+# Browsers revalidate on every use, so clients get 304s without code changes
+CACHE_CONTROL = "private, no-cache"
+
+
+async def current_version(user_id: str) -> int:
+    doc = await versions_collection.find_one({"_id": user_id}, {"version": 1})
+    return doc["version"] if doc else 0
+
+
+async def bump_version(user_id: str):
+    """Mark the user's transactions as changed; call after every write"""
+    await versions_collection.update_one({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+
+
+def make_etag(user_id: str, version: int, request: Request) -> str:
+    """Strong ETag for one representation of the user's data at `version`"""
+    variant = "\n".join((
+        user_id,
+        request.url.path,
+        "&".join(sorted(str(request.query_params).split("&"))),
+        request.headers.get("accept", ""),
+    ))
+    digest = hashlib.sha1(variant.encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so a W/ prefix is ignored"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def check_etag(request: Request, user_id: str) -> Tuple[dict, Optional[Response]]:
+    """Validator headers for this read, and a 304 response if the client's copy is current"""
+    etag = make_etag(user_id, await current_version(user_id), request)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return headers, Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return headers, None
@@ -0,0 +1,63 @@
+"""Microbenchmark of the overspend check added to transaction writes.
+
+The check compares the rollup document the write already returns against the
+user's cached budgets, so it adds no query. This measures its CPU cost per
+write for an expense with a budget, one without, and an income.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_budgets --iterations 100000
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime
+from bson import ObjectId
+
+from app.budgets import budget_cache, check_overspend
+
+USER_ID = "60f7b1b3b3f3f3f3f3f3f3f3"
+
+
+async def measure(transaction: dict, rollup: dict, iterations: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await check_overspend(transaction, rollup)
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "per_call_us": round(elapsed / iterations * 1e6, 3),
+        "calls_per_s": round(iterations / elapsed),
+    }
+
+
+async def main(iterations: int):
+    # Warm cache, as after the user's first write
+    budget_cache.set(USER_ID, {
+        f"category{i}": {
+            "_id": ObjectId(), "user_id": USER_ID, "category": f"category{i}",
+            "monthly_limit": 500.0, "alert_threshold": 0.8,
+        }
+        for i in range(20)
+    })
+
+    expense = {
+        "user_id": USER_ID, "type": "expense", "category": "category3",
+        "amount": 25.0, "transaction_date": datetime(2025, 4, 26),
+    }
+    rollup = {"user_id": USER_ID, "month": "2025-04", "category": "category3", "expenses": 450.0}
+
+    results = {
+        "budgeted_expense": await measure(expense, rollup, iterations),
+        "unbudgeted_expense": await measure({**expense, "category": "other"}, rollup, iterations),
+        "income": await measure({**expense, "type": "income"}, rollup, iterations),
+        "cache": budget_cache.stats(),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    asyncio.run(main(parser.parse_args().iterations))
@@ -0,0 +1,86 @@
+"""Login password-verification throughput and latency through the bcrypt worker pool.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_password --rounds 10 --concurrency 1 4 16 64
+
+Each concurrency level issues --requests verifications through
+PasswordManager.verify_password_async and reports throughput, p50/p99
+latency and how many calls were shed with PasswordHashingBusy.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_level(concurrency: int, total: int, hashed: str):
+    from app.auth import PasswordHashingBusy, PasswordManager
+
+    latencies = []
+    rejected = 0
+    remaining = total
+
+    async def client():
+        nonlocal remaining, rejected
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                await PasswordManager.verify_password_async("password123", hashed)
+            except PasswordHashingBusy:
+                rejected += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "completed": len(latencies),
+        "rejected": rejected,
+        "throughput_per_s": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def main(args):
+    from app.auth import PasswordManager, password_pool
+
+    hashed = PasswordManager.hash_password("password123")
+    results = []
+    for level in args.concurrency:
+        results.append(await run_level(level, args.requests, hashed))
+    password_pool.shutdown()
+
+    print(json.dumps({
+        "bcrypt_rounds": args.rounds,
+        "workers": password_pool.workers,
+        "queue_size": password_pool.queue_size,
+        "levels": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost factor")
+    parser.add_argument("--requests", type=int, default=200, help="verifications per level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    # The auth module reads its settings at import time
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    asyncio.run(main(args))
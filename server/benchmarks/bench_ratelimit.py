@@ -0,0 +1,90 @@
+"""Microbenchmark of the rate limiter's per-request overhead.
+
+Measures a bare MemoryBucketStore take, then a request through a no-op ASGI
+app with and without RateLimitMiddleware, keyed by client address and by a
+(cached) bearer token.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_ratelimit --iterations 100000 --keys 10000
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.auth import TokenManager
+from app.ratelimit import MemoryBucketStore, RATE_LIMITS, RateLimit, RateLimitMiddleware
+
+# Generous enough that no request is limited; only the bookkeeping is measured
+LIMIT = RateLimit(rate=1e9, per=1, burst=10 ** 9, key="user")
+
+
+async def noop_app(scope, receive, send):
+    pass
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+def scope_for(i: int, path: str, headers: list) -> dict:
+    client = (f"10.0.{i // 256 % 256}.{i % 256}", 1234)
+    return {"type": "http", "method": "GET", "path": path, "headers": headers, "client": client}
+
+
+async def measure(app, scopes: list, iterations: int) -> dict:
+    started = time.perf_counter()
+    for i in range(iterations):
+        await app(scopes[i % len(scopes)], receive, send)
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "per_call_us": round(elapsed / iterations * 1e6, 3),
+        "calls_per_s": round(iterations / elapsed),
+    }
+
+
+async def main(iterations: int, keys: int):
+    limits = {**RATE_LIMITS, "* /transactions/*": LIMIT}
+    limited = RateLimitMiddleware(noop_app, limits, MemoryBucketStore(max_keys=keys * 2))
+
+    tokens = [
+        TokenManager.create_access_token(data={"sub": f"{i:024x}"}) for i in range(min(keys, 1000))
+    ]
+    ip_scopes = [scope_for(i, "/transactions/", []) for i in range(keys)]
+    user_scopes = [
+        scope_for(i, "/transactions/", [(b"authorization", f"Bearer {tokens[i % len(tokens)]}".encode())])
+        for i in range(keys)
+    ]
+
+    store = MemoryBucketStore(max_keys=keys * 2)
+    started = time.perf_counter()
+    for i in range(iterations):
+        store.take_now(("route", i % keys), LIMIT, time.monotonic())
+    store_us = (time.perf_counter() - started) / iterations * 1e6
+
+    results = {
+        "store_take_us": round(store_us, 3),
+        "no_middleware": await measure(noop_app, ip_scopes, iterations),
+        "by_ip": await measure(limited, ip_scopes, iterations),
+        "by_user": await measure(limited, user_scopes, iterations),
+        "unlimited_route": await measure(limited, [scope_for(0, "/", [])], iterations),
+    }
+    baseline = results["no_middleware"]["per_call_us"]
+    results["overhead_us"] = {
+        name: round(results[name]["per_call_us"] - baseline, 3) for name in ("by_ip", "by_user", "unlimited_route")
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--keys", type=int, default=10000, help="distinct clients cycled through")
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.keys))
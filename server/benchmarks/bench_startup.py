@@ -0,0 +1,57 @@
+"""Per-worker boot time: importing app.main and running the app lifespan startup.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_startup --runs 10
+
+Each run is a fresh interpreter, as a newly spawned uvicorn worker would be.
+Point MONGODB_URI at an unreachable host to confirm that a slow or missing
+MongoDB no longer delays startup.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+
+async def boot():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        return time.perf_counter()
+
+ready = asyncio.run(boot())
+print(json.dumps({"import_s": imported - started, "startup_s": ready - imported}))
+"""
+
+
+def main(runs: int):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    def summarize(key):
+        values = [s[key] * 1000 for s in samples]
+        return {
+            "median_ms": round(statistics.median(values), 2),
+            "max_ms": round(max(values), 2),
+        }
+
+    print(json.dumps({
+        "runs": runs,
+        "import": summarize("import_s"),
+        "lifespan_startup": summarize("startup_s"),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    main(parser.parse_args().runs)
@@ -0,0 +1,44 @@
+"""Microbenchmark of TokenManager.verify_token with and without the claims cache.
+
+Run from the server directory:
+
+    python -m benchmarks.bench_tokens --iterations 20000
+"""
+import argparse
+import json
+import time
+
+from app.auth import TokenManager, token_cache
+
+
+def measure(func, iterations: int) -> dict:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - started
+    return {
+        "iterations": iterations,
+        "per_call_us": round(elapsed / iterations * 1e6, 3),
+        "calls_per_s": round(iterations / elapsed),
+    }
+
+
+def main(iterations: int):
+    token = TokenManager.create_access_token(data={"sub": "60f7b1b3b3f3f3f3f3f3f3f3"})
+    invalid = token[:-4] + ("AAAA" if not token.endswith("AAAA") else "BBBB")
+
+    token_cache.clear()
+    results = {
+        "uncached": measure(lambda: TokenManager.verify_token(token, use_cache=False), iterations),
+        "cached": measure(lambda: TokenManager.verify_token(token), iterations),
+        "invalid": measure(lambda: TokenManager.verify_token(invalid), iterations),
+    }
+    results["speedup"] = round(results["uncached"]["per_call_us"] / results["cached"]["per_call_us"], 1)
+    results["cache"] = token_cache.stats()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    main(parser.parse_args().iterations)
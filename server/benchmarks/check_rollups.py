@@ -0,0 +1,103 @@
+"""Regression check of the rollup deltas applied by transaction writes.
+
+Replays create, edit and delete sequences through rollups.apply_transaction
+and apply_change against an in-memory rollups collection, and fails unless
+the counters end where a rebuild from raw transactions would put them. Edits
+that keep the month, category and type must move the amount only, never the
+count.
+
+Run from the server directory:
+
+    python -m benchmarks.check_rollups
+"""
+import asyncio
+import json
+from datetime import datetime
+
+from app import rollups
+
+USER_ID = "60f7b1b3b3f3f3f3f3f3f3f3"
+
+
+class MemoryCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def to_list(self, length=None):
+        return self.documents
+
+
+class MemoryRollups:
+    """The slice of the rollups collection used by the write and summary paths"""
+
+    def __init__(self):
+        self.documents = {}
+
+    async def find_one_and_update(self, key, update, upsert=False, return_document=None):
+        doc = self.documents.setdefault(tuple(sorted(key.items())), dict(key))
+        for field, delta in update["$inc"].items():
+            doc[field] = doc.get(field, 0) + delta
+        return dict(doc)
+
+    def find(self, query, projection=None):
+        return MemoryCursor([
+            dict(doc) for doc in self.documents.values()
+            if all(doc.get(field) == value for field, value in query.items())
+        ])
+
+
+async def replay(steps) -> dict:
+    """Apply (old, new) write steps; old None is a create, new None a delete"""
+    rollups.rollups_collection = MemoryRollups()
+    for old, new in steps:
+        if old is None:
+            await rollups.apply_transaction(new, 1)
+        elif new is None:
+            await rollups.apply_transaction(old, -1)
+        else:
+            await rollups.apply_change(old, new)
+    return await rollups.rollup_summary(USER_ID)
+
+
+async def main() -> int:
+    expense = {
+        "user_id": USER_ID, "type": "expense", "category": "Food",
+        "amount": 25.0, "transaction_date": datetime(2025, 4, 26),
+    }
+    edited = {**expense, "description": "edited"}
+    repriced = {**edited, "amount": 40.0}
+    moved = {**repriced, "category": "Travel"}
+
+    cases = {
+        "create_edit_edit": (
+            [(None, expense), (expense, edited), (edited, repriced)],
+            {"count": 1, "expenses": 40.0},
+        ),
+        "create_edit_edit_delete": (
+            [(None, expense), (expense, edited), (edited, repriced), (repriced, None)],
+            {"count": 0, "expenses": 0.0},
+        ),
+        "create_recategorize_delete": (
+            [(None, expense), (expense, moved), (moved, None)],
+            {"count": 0, "expenses": 0.0},
+        ),
+    }
+
+    results, failed = {}, 0
+    for name, (steps, expected) in cases.items():
+        summary = await replay(steps)
+        totals = {"count": summary["totals"]["count"], "expenses": summary["totals"]["expenses"]}
+        # Emptied keys must drop out of the summary entirely
+        if expected["count"] == 0:
+            ok = totals == expected and not summary["monthly"] and not summary["categories"]
+        else:
+            ok = totals == expected
+        failed += not ok
+        results[name] = {"ok": ok, "totals": totals, "expected": expected}
+
+    print(json.dumps(results, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,329 @@
+"""Load test for the FastAPI server against a local MongoDB.
+
+Seeds N users with M transactions each into a throwaway database, drives the
+login, list, create, update, delete, summary and budget status routes
+concurrently through httpx.AsyncClient over the ASGI app (no network
+server), and reports throughput and p50/p95/p99 latency per endpoint as JSON.
+The bulk_csv and bulk_ndjson scenarios POST /transactions/bulk uploads of
+--bulk-rows rows each and also report rows_per_s.
+
+Run from the server directory against a local mongod:
+
+    python -m benchmarks.load --users 20 --transactions 2000 --output bench.json
+    python -m benchmarks.load --baseline bench.json --threshold 20
+
+With --baseline the run exits non-zero when any route's p95 latency is more
+than --threshold percent worse (or throughput that much lower) than the
+baseline's. The benchmark database is dropped afterwards unless --keep.
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+CATEGORIES = {
+    "expense": ["food", "transportation", "entertainment", "utilities", "other"],
+    "income": ["salary", "gift", "investment", "other"],
+}
+PASSWORD = "password123"
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def random_transaction(rng: random.Random) -> dict:
+    type = "income" if rng.random() < 0.2 else "expense"
+    day = datetime(2023, 1, 1) + timedelta(days=rng.randrange(3 * 365))
+    return {
+        "description": f"Benchmark {type} {rng.randrange(10000)}",
+        "amount": round(rng.uniform(1, 500), 2),
+        "type": type,
+        "category": rng.choice(CATEGORIES[type]),
+        "transaction_date": day,
+    }
+
+
+def bulk_bodies(rows: int, rng: random.Random) -> dict:
+    """One CSV and one NDJSON upload body of `rows` random transactions"""
+    transactions = []
+    for _ in range(rows):
+        transaction = random_transaction(rng)
+        transaction["transaction_date"] = transaction["transaction_date"].date().isoformat()
+        transactions.append(transaction)
+
+    from app.bulk import CSV_COLUMNS
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_COLUMNS)
+    writer.writeheader()
+    writer.writerows(transactions)
+    return {
+        "csv": buffer.getvalue().encode(),
+        "ndjson": "".join(json.dumps(t) + "\n" for t in transactions).encode(),
+    }
+
+
+async def seed(users: int, transactions: int, rng: random.Random) -> list:
+    """Insert users and their transactions directly; returns [(email, user_id)]"""
+    from app.auth import PasswordManager
+    from app.database import budgets_collection, collection, users_collection
+    from app.rollups import rebuild_rollups
+
+    hashed = PasswordManager.hash_password(PASSWORD)
+    now = datetime.utcnow()
+    seeded = []
+    for i in range(users):
+        email = f"bench{i}@example.com"
+        result = await users_collection.insert_one({
+            "email": email, "password": hashed, "first_name": "Bench", "last_name": f"User{i}",
+            "role": "user", "is_active": True, "is_verified": False,
+            "created_at": now, "updated_at": now, "last_login": None,
+        })
+        user_id = str(result.inserted_id)
+        seeded.append((email, user_id))
+
+        for start in range(0, transactions, 1000):
+            batch = []
+            for _ in range(min(1000, transactions - start)):
+                doc = random_transaction(rng)
+                doc.update({"user_id": user_id, "created_at": now, "updated_at": now})
+                batch.append(doc)
+            await collection.insert_many(batch, ordered=False)
+
+        # Budgets on every expense category, so creates exercise the overspend check
+        await budgets_collection.insert_many([
+            {"user_id": user_id, "category": category, "monthly_limit": 1000.0, "alert_threshold": 0.8,
+             "created_at": now, "updated_at": now}
+            for category in CATEGORIES["expense"]
+        ])
+
+    await rebuild_rollups()
+    return seeded
+
+
+async def run_scenario(name: str, requests: int, concurrency: int, make_request) -> dict:
+    """Issue `requests` calls of make_request(i) from `concurrency` workers.
+
+    make_request returns None to count the call as an error, for example when
+it has nothing to send.
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            response = await make_request(i)
+            elapsed = time.perf_counter() - started
+            if response is None or response.status_code >= 400:
+                errors += 1
+            else:
+                latencies.append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "endpoint": name,
+        "requests": requests,
+        "errors": errors,
+        "throughput_per_s": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def run(args) -> dict:
+    import httpx
+    from app import database
+    from app.main import app
+    from app.auth import password_pool
+
+    from app.migrations import migrate
+
+    rng = random.Random(args.seed)
+    await database.connect()
+    try:
+        await migrate()
+        seeded = await seed(args.users, args.transactions, rng)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            async def login(i):
+                email, _ = seeded[i % len(seeded)]
+                return await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+
+            # Tokens for the data routes, one per user
+            tokens = []
+            for email, _ in seeded:
+                response = await client.post("/auth/login", json={"email": email, "password": PASSWORD})
+                tokens.append({"Authorization": f"Bearer {response.json()['access_token']}"})
+
+            def headers(i):
+                return tokens[i % len(tokens)]
+
+            created = [[] for _ in tokens]
+
+            async def create(i):
+                body = random_transaction(rng)
+                body["transaction_date"] = body["transaction_date"].date().isoformat()
+                response = await client.post("/transactions/", json=body, headers=headers(i))
+                if response.status_code < 400:
+                    created[i % len(tokens)].append(response.json()["id"])
+                return response
+
+            async def list_page(i):
+                return await client.get("/transactions/", params={"limit": 50}, headers=headers(i))
+
+            async def summary(i):
+                return await client.get("/transactions/summary", headers=headers(i))
+
+            async def budget_status(i):
+                return await client.get("/budgets/status", params={"month": "2024-06"}, headers=headers(i))
+
+            async def update(i):
+                ids = created[i % len(tokens)]
+                if not ids:
+                    # Every create for this user failed (e.g. 429 or 503)
+                    return None
+                transaction_id = ids[(i // len(tokens)) % len(ids)]
+                return await client.put(
+                    f"/transactions/{transaction_id}",
+                    json={"amount": round(rng.uniform(1, 500), 2)},
+                    headers=headers(i),
+                )
+
+            async def delete(i):
+                ids = created[i % len(tokens)]
+                if not ids:
+                    return None
+                transaction_id = ids.pop()
+                return await client.delete(f"/transactions/{transaction_id}", headers=headers(i))
+
+            bodies = bulk_bodies(args.bulk_rows, rng)
+
+            def bulk(format):
+                async def upload(i):
+                    response = await client.post(
+                        "/transactions/bulk", params={"format": format},
+                        content=bodies[format], headers=headers(i),
+                    )
+                    # A 200 with rejected rows did not import them all
+                    if response.status_code < 400 and response.json()["failed"]:
+                        return None
+                    return response
+                return upload
+
+            async def bulk_scenario(format):
+                result = await run_scenario(
+                    f"bulk_{format}", args.bulk_requests, min(args.concurrency, args.bulk_requests), bulk(format)
+                )
+                result["rows_per_s"] = round(result["throughput_per_s"] * args.bulk_rows, 2)
+                return result
+
+            n, c = args.requests, args.concurrency
+            results = [
+                await run_scenario("login", min(n, args.login_requests), c, login),
+                await run_scenario("list", n, c, list_page),
+                await run_scenario("summary", n, c, summary),
+                await run_scenario("budget_status", n, c, budget_status),
+                await run_scenario("create", n, c, create),
+                await run_scenario("update", n, c, update),
+                await run_scenario("delete", n, c, delete),
+                await bulk_scenario("csv"),
+                await bulk_scenario("ndjson"),
+            ]
+    finally:
+        if not args.keep:
+            await database.client.drop_database(database.DATABASE_NAME)
+        password_pool.shutdown()
+        await database.close()
+
+    return {
+        "config": {
+            "users": args.users,
+            "transactions_per_user": args.transactions,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "bulk_rows": args.bulk_rows,
+            "bcrypt_rounds": args.bcrypt_rounds,
+        },
+        "endpoints": {r["endpoint"]: r for r in results},
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list:
+    """Return human-readable regressions of current against baseline"""
+    regressions = []
+    limit = 1 + threshold / 100
+    for name, base in baseline["endpoints"].items():
+        now = current["endpoints"].get(name)
+        if now is None:
+            continue
+        if base["p95_ms"] and now["p95_ms"] > base["p95_ms"] * limit:
+            regressions.append(f"{name}: p95 {base['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now["throughput_per_s"] * limit < base["throughput_per_s"]:
+            regressions.append(
+                f"{name}: throughput {base['throughput_per_s']}/s -> {now['throughput_per_s']}/s"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Budget Tracker API")
+    parser.add_argument("--mongodb-uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    parser.add_argument("--database", default="budgetTracker_bench")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--transactions", type=int, default=1000, help="transactions seeded per user")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--login-requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--bulk-requests", type=int, default=4, help="uploads per bulk format")
+    parser.add_argument("--bulk-rows", type=int, default=10000, help="rows per bulk upload")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results JSON to this path")
+    parser.add_argument("--baseline", help="compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=20.0, help="allowed regression in percent")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database")
+    args = parser.parse_args()
+
+    # The app modules read their settings at import time
+    os.environ["MONGODB_URI"] = args.mongodb_uri
+    os.environ["MONGODB_DATABASE"] = args.database
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    # Every simulated user shares one client address; measure the routes, not the limiter
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print("Regressions beyond threshold:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()